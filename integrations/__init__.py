@@ -1,10 +1,10 @@
 """
-Personal AI Agent - �APIq����
+Personal AI Agent - 外部API統合モジュール
 """
 
 from .llm_provider import LLMProviderManager, LLMProvider, ChatMessage, LLMResponse
 
-# ��ꢹ
+# エイリアス
 LLMProvider = LLMProviderManager
 
 __all__ = [
@@ -12,4 +12,4 @@ __all__ = [
     "LLMProvider", 
     "ChatMessage",
     "LLMResponse"
-]
\ No newline at end of file
+]
@@ -9,6 +9,7 @@ from abc import ABC, abstractmethod
 from typing import Dict, List, Optional, Any, AsyncGenerator
 from dataclasses import dataclass
 from enum import Enum
+import httpx
 import openai
 import anthropic
 
@@ -45,7 +46,14 @@ class BaseLLMClient(ABC):
     def __init__(self, config: LLMConfig):
         self.config = config
         self.client = None
-    
+        self.http_client: Optional[httpx.AsyncClient] = None
+
+    def set_http_client(self, http_client: Optional[httpx.AsyncClient]) -> None:
+        """共有HTTPクライアントを設定（接続プールの再利用）"""
+        self.http_client = http_client
+        # 次回呼び出し時に新しいHTTPクライアントで再初期化する
+        self.client = None
+
     @abstractmethod
     async def initialize(self) -> None:
         """クライアントの初期化"""
@@ -78,7 +86,13 @@ class OpenAIClient(BaseLLMClient):
         if not self.config.api_key:
             raise ValueError("OpenAI API key is required")
         
-        self.client = openai.AsyncOpenAI(api_key=self.config.api_key)
+        if self.http_client is not None:
+            self.client = openai.AsyncOpenAI(
+                api_key=self.config.api_key,
+                http_client=self.http_client
+            )
+        else:
+            self.client = openai.AsyncOpenAI(api_key=self.config.api_key)
         logger.info("OpenAI client initialized")
     
     async def generate_response(self, 
@@ -188,7 +202,13 @@ class AnthropicClient(BaseLLMClient):
         if not self.config.api_key:
             raise ValueError("Anthropic API key is required")
         
-        self.client = anthropic.AsyncAnthropic(api_key=self.config.api_key)
+        if self.http_client is not None:
+            self.client = anthropic.AsyncAnthropic(
+                api_key=self.config.api_key,
+                http_client=self.http_client
+            )
+        else:
+            self.client = anthropic.AsyncAnthropic(api_key=self.config.api_key)
         logger.info("Anthropic client initialized")
     
     async def generate_response(self, 
@@ -335,6 +355,11 @@ class LLMProviderManager:
         """アクティブなクライアントを初期化"""
         if self.active_client:
             await self.active_client.initialize()
+
+    def set_client(self, http_client: Optional[httpx.AsyncClient]) -> None:
+        """全クライアントに共有HTTPクライアントを設定"""
+        for client in self.clients.values():
+            client.set_http_client(http_client)
     
     async def generate_response(self, 
                               prompt: str,
@@ -1,19 +1,19 @@
 """
-Personal AI Agent - �������է��
+Personal AI Agent - ユーザーインターフェース
 """
 
 from .cli import CLIInterface
 
-# Web UI n��������e�ň�	
+# Web UI のプレースホルダー（簡易実装）
 class WebInterface:
     def __init__(self, agent):
         self.agent = agent
     
     async def run(self):
-        print("Web ���է��o�z-gY")
-        print("CLI ���է���T)(O`UD: python main.py start")
+        print("Web インターフェースは開発中です")
+        print("CLI インターフェースをご利用ください: python main.py start")
 
 __all__ = [
     "CLIInterface",
     "WebInterface"
-]
\ No newline at end of file
+]
@@ -1,20 +1,20 @@
 """
-Personal AI Agent - _�����
+Personal AI Agent - 機能モジュール
 """
 
 from .task_manager import TaskManager, Task, TaskStatus, TaskPriority
 from .communication import CommunicationModule, CommunicationType, ToneStyle
 
-# �n����n��������e�ň�	
+# 将来モジュールのプレースホルダー（簡易実装）
 class WebScraperModule:
     def __init__(self):
         pass
     
     async def search_and_summarize(self, query: str, context=None):
         return {
-            "summary": f"'{query}' n"P���-...",
+            "summary": f"'{query}' の検索結果を準備中...",
             "sources": ["example.com"],
-            "suggestions": ["s0j"��LW~YK"]
+            "suggestions": ["詳細な条件を指定しますか？"]
         }
 
 class QASystem:
@@ -24,9 +24,9 @@ class QASystem:
     
     async def answer_question(self, question: str, context=None):
         return {
-            "answer": f"'{question}' kdDfJTHW~Y...",
+            "answer": f"'{question}' についてお answer します...",
             "sources": ["knowledge_base"],
-            "suggestions": ["�#Y��O�W~YK"]
+            "suggestions": ["関連する質問をしますか？"]
         }
 
 class LifeAnalyticsModule:
@@ -35,8 +35,8 @@ class LifeAnalyticsModule:
     
     async def generate_insights(self, request: str, context=None):
         return {
-            "insights": f"'{request}' k�Y��P��-...",
-            "suggestions": ["s0j���LW~YK"]
+            "insights": f"'{request}' に関する分析を準備中...",
+            "suggestions": ["詳細な分析をしますか？"]
         }
 
 __all__ = [
@@ -50,4 +50,4 @@ __all__ = [
     "WebScraperModule",
     "QASystem", 
     "LifeAnalyticsModule"
-]
\ No newline at end of file
+]
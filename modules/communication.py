@@ -9,6 +9,8 @@ from typing import Dict, List, Optional, Any
 from dataclasses import dataclass
 from enum import Enum
 
+import httpx
+
 logger = logging.getLogger(__name__)
 
 class CommunicationType(Enum):
@@ -48,7 +50,10 @@ class CommunicationModule:
     
     def __init__(self, llm_provider):
         self.llm_provider = llm_provider
-        
+
+        # 共有HTTPクライアント（async with で開閉）
+        self._http_client: Optional[httpx.AsyncClient] = None
+
         # テンプレート管理
         self.templates: Dict[str, CommunicationTemplate] = {}
         self._initialize_templates()
@@ -134,6 +139,31 @@ class CommunicationModule:
             )
             self.templates[template.template_id] = template
     
+    async def __aenter__(self) -> "CommunicationModule":
+        """共有HTTPクライアントを開き、LLMプロバイダーに引き渡す
+
+        接続プールとHTTP/2多重化により、LLM呼び出しごとの
+        TLSハンドシェイクを排除する
+        """
+        self._http_client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+            timeout=120
+        )
+
+        if hasattr(self.llm_provider, "set_client"):
+            self.llm_provider.set_client(self._http_client)
+
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        """共有HTTPクライアントをクローズ"""
+        if self._http_client is not None:
+            if hasattr(self.llm_provider, "set_client"):
+                self.llm_provider.set_client(None)
+            await self._http_client.aclose()
+            self._http_client = None
+
     async def generate_draft(self, user_input: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """コミュニケーション草案の生成"""
         
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Personal AI Agent - キーワード一括マッチング
+"""
+
+from collections import deque
+from typing import Any, Dict, Iterator, List, Tuple
+
+
+class AhoCorasickMatcher:
+    """
+    Aho-Corasick オートマトンによる複数キーワードの一括検索
+
+    登録した全キーワードを入力文字列の一回の走査でまとめて検出する。
+    キーワードごとの `in` スキャンと違い、計算量はキーワード数に
+    依存せず O(入力長 + ヒット数) で済む
+    """
+
+    def __init__(self) -> None:
+        # 各ノードは {文字: 子ノードID} の遷移表を持つ
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, Any]]] = [[]]
+        self._compiled = False
+
+    def add_word(self, word: str, payload: Any) -> None:
+        """キーワードと対応するペイロードを登録"""
+
+        if not word:
+            return
+
+        node = 0
+        for char in word:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = next_node
+
+        self._output[node].append((len(word), payload))
+        self._compiled = False
+
+    def compile(self) -> None:
+        """failure リンクを構築してオートマトンを確定"""
+
+        queue = deque()
+
+        for child in self._goto[0].values():
+            self._fail[child] = 0
+            queue.append(child)
+
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+
+                fail_target = self._goto[fail].get(char, 0)
+                self._fail[child] = fail_target if fail_target != child else 0
+                self._output[child].extend(self._output[self._fail[child]])
+
+        self._compiled = True
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, Any]]:
+        """text 中の全ヒットを (開始位置, 終了位置, ペイロード) で列挙"""
+
+        if not self._compiled:
+            self.compile()
+
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+
+            for length, payload in self._output[node]:
+                yield index - length + 1, index + 1, payload
+
+    def find_payloads(self, text: str) -> set:
+        """text にヒットした全ペイロードの集合を返す"""
+
+        return {payload for _, _, payload in self.iter_matches(text)}
@@ -3,15 +3,52 @@
 Personal AI Agent - Task Management Module
 """
 
+import asyncio
+import bisect
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, asdict
+from functools import lru_cache
 from enum import Enum
 import re
+import uuid
+
+from .keyword_matcher import AhoCorasickMatcher
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    import json
+    _json_loads = json.loads
 
 logger = logging.getLogger(__name__)
 
+# Sentinel for tasks without a due date; sorts after any real deadline
+_NO_DUE_DATE = float("inf")
+
+# Parsing patterns compiled once at import time
+_DURATION_PATTERN = re.compile(
+    r'(?:(?P<hours>\d+)\s*(?:hours?|時間))|(?:(?P<minutes>\d+)\s*(?:minutes?|分))',
+    re.IGNORECASE
+)
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+# Common create phrasings handled without an LLM round-trip
+_FAST_CREATE_PATTERNS = (
+    re.compile(
+        r'^(?:add|create|new)\s+(?:a\s+)?(?:task\s*[::]?\s*)?(?P<title>.+?)'
+        r'(?:\s+by\s+(?P<when>today|tomorrow|\d{4}-\d{2}-\d{2}))?'
+        r'(?:[,、]\s*(?P<prio>urgent|high|medium|low)\s+priority)?'
+        r'(?:[,、]\s*(?P<dur>\d+\s*(?:hours?|minutes?)))?\s*$',
+        re.IGNORECASE
+    ),
+    re.compile(
+        r'^「?(?P<title>[^「」]+?)」?というタスクを(?:追加|作成)'
+    ),
+)
+
 class TaskStatus(Enum):
     """Task status enumeration"""
     PENDING = "pending"
@@ -27,7 +64,67 @@ class TaskPriority(Enum):
     HIGH = "high"
     URGENT = "urgent"
 
-@dataclass
+    @property
+    def rank(self) -> int:
+        """Numeric sort rank; urgent sorts first"""
+        return _PRIORITY_RANK[self]
+
+_PRIORITY_RANK = {
+    TaskPriority.URGENT: 0,
+    TaskPriority.HIGH: 1,
+    TaskPriority.MEDIUM: 2,
+    TaskPriority.LOW: 3
+}
+
+# Value -> member tables; dict lookup is several times cheaper than
+# going through Enum.__call__ on every LLM-driven create/update
+_PRIORITY_BY_VALUE = {priority.value: priority for priority in TaskPriority}
+_STATUS_BY_VALUE = {status.value: status for status in TaskStatus}
+
+# Display emoji, built once instead of per lookup
+_STATUS_EMOJI = {
+    TaskStatus.PENDING: "⏳",
+    TaskStatus.IN_PROGRESS: "🔄",
+    TaskStatus.COMPLETED: "✅",
+    TaskStatus.CANCELLED: "❌",
+    TaskStatus.PAUSED: "⏸️"
+}
+_PRIORITY_EMOJI = {
+    TaskPriority.LOW: "🟢",
+    TaskPriority.MEDIUM: "🟡",
+    TaskPriority.HIGH: "🟠",
+    TaskPriority.URGENT: "🔴"
+}
+
+# Listing row template, formatted per task in _list_tasks
+_ROW_FORMAT = "{status} {priority} {title} (Due: {due})"
+
+# LLM prompt templates; only the user input varies between calls, so the
+# static body is built once and providers with prompt-prefix caches can
+# reuse the shared prefix
+_EXTRACTION_PROMPT_TEMPLATE = """
+        Extract task information from the following user input:
+
+        Input: {user_input}
+
+        Return JSON in the following format:
+        {{
+            "title": "Task title",
+            "description": "Detailed description (if any)",
+            "priority": "low/medium/high/urgent",
+            "due_date": "YYYY-MM-DD (if explicit date given)",
+            "tags": ["tag1", "tag2"],
+            "estimated_duration": "duration (e.g., 2 hours, 30 minutes)"
+        }}
+        """
+
+_ASSISTANCE_PROMPT_TEMPLATE = """
+        Task-related question from user: {user_input}
+
+        Considering current task situation, generate useful advice or suggestions.
+        """
+
+@dataclass(slots=True)
 class Task:
     """Task data class"""
     id: str
@@ -45,6 +142,7 @@ class Task:
     dependencies: List[str]  # Dependent task IDs
     subtasks: List[str]      # Subtask IDs
     metadata: Dict[str, Any]
+    started_at: Optional[datetime] = None  # First transition to IN_PROGRESS
 
 class TaskManager:
     """
@@ -60,121 +158,282 @@ class TaskManager:
         
         # Task storage (use database in actual implementation)
         self.tasks: Dict[str, Task] = {}
-        
-        # Task analysis patterns
+
+        # Lowercased titles kept in sync with self.tasks so task
+        # identification does not re-casefold every title per call
+        self._lower_titles: Dict[str, str] = {}
+
+        # Title automaton for O(|input|) identification, rebuilt lazily
+        # whenever the title set changes
+        self._title_matcher: Optional[AhoCorasickMatcher] = None
+        self._title_tokens: Dict[str, set] = {}
+        self._sorted_titles: List[str] = []
+        self._title_matcher_dirty = True
+
+        # Secondary indexes over self.tasks so listing and analytics
+        # touch only matching tasks instead of scanning everything; their
+        # sizes double as live per-status / per-priority counters
+        self._by_status: Dict[TaskStatus, set] = {status: set() for status in TaskStatus}
+        self._by_priority: Dict[TaskPriority, set] = {priority: set() for priority in TaskPriority}
+
+        # Sorted (due_date, task_id) pairs; date-window filters slice
+        # this with bisect instead of checking every task
+        self._due_index: List[tuple] = []
+
+        # Sort keys precomputed per task; refreshed only when priority
+        # or due date changes instead of rebuilt for every sort
+        self._sort_keys: Dict[str, tuple] = {}
+
+        # Background write queue drained by a single worker task so
+        # memory writes stay ordered without blocking the caller
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._write_worker: Optional["asyncio.Task"] = None
+        
+        # Task analysis patterns; frozen so the automatons and the flat
+        # inversions built from them can never drift out of sync
+        self.action_keywords = {
+            "create": frozenset({"create", "add", "new", "register", "todo",
+                                 "作成", "追加", "新規", "登録"}),
+            "list": frozenset({"list", "show", "display", "view",
+                               "一覧", "表示", "リスト", "見せて"}),
+            "update": frozenset({"update", "change", "modify", "edit",
+                                 "更新", "変更", "修正"}),
+            "complete": frozenset({"complete", "finish", "done",
+                                   "完了", "終わった", "済んだ"}),
+            "delete": frozenset({"delete", "remove", "cancel",
+                                 "削除", "キャンセル", "取り消し"})
+        }
         self.priority_keywords = {
-            TaskPriority.URGENT: ["urgent", "asap", "immediately", "critical"],
-            TaskPriority.HIGH: ["important", "priority", "high", "soon"],
-            TaskPriority.MEDIUM: ["normal", "medium", "standard"],
-            TaskPriority.LOW: ["later", "low", "when_possible", "someday"]
+            TaskPriority.URGENT: frozenset({"urgent", "asap", "immediately", "critical",
+                                            "緊急", "至急", "今すぐ"}),
+            TaskPriority.HIGH: frozenset({"important", "priority", "high", "soon",
+                                          "重要", "優先", "高い"}),
+            TaskPriority.MEDIUM: frozenset({"normal", "medium", "standard", "普通"}),
+            TaskPriority.LOW: frozenset({"later", "low", "when_possible", "someday",
+                                         "後で", "低い", "いつか"})
         }
-        
+        self.status_keywords = {
+            "in_progress": frozenset({"in progress", "working", "進行中", "作業中"}),
+            "completed": frozenset({"completed", "完了済み"}),
+            "pending": frozenset({"pending", "remaining", "未着手", "残って"})
+        }
+        self.date_keywords = {
+            "today": frozenset({"today", "今日"}),
+            "tomorrow": frozenset({"tomorrow", "明日"}),
+            "this_week": frozenset({"this week", "今週"})
+        }
+
+        self.update_status_keywords = {
+            TaskStatus.IN_PROGRESS: frozenset({"start", "begin", "開始", "着手"}),
+            TaskStatus.COMPLETED: frozenset({"complete", "完了"}),
+            TaskStatus.PAUSED: frozenset({"pause", "hold", "中断", "保留"})
+        }
+
+        # Flat keyword -> value inversions of the tables above; the
+        # automaton builders consume these directly
+        self._keyword_to_priority = {
+            keyword: priority
+            for priority, keywords in self.priority_keywords.items()
+            for keyword in keywords
+        }
+        self._keyword_to_update_status = {
+            keyword: status
+            for status, keywords in self.update_status_keywords.items()
+            for keyword in keywords
+        }
+
+        # Exact stock phrasings resolved with one dict lookup before any
+        # keyword scanning; grown from phrases real usage hits often
+        self._fast_intents = {
+            "タスク一覧": ("list", {}),
+            "タスクを表示": ("list", {}),
+            "今日のタスク": ("list", {"due_date": "today"}),
+            "明日のタスク": ("list", {"due_date": "tomorrow"}),
+            "今週のタスク": ("list", {"due_date": "this_week"}),
+            "task list": ("list", {}),
+            "show tasks": ("list", {}),
+            "today's tasks": ("list", {"due_date": "today"})
+        }
+
+        # Single-pass keyword automaton over all intent vocabularies
+        self._intent_matcher = self._build_intent_matcher()
+
+        # Companion automaton for update extraction: priority keywords
+        # plus the status-transition verbs, tagged in one sweep
+        self._update_matcher = self._build_update_matcher()
+
+        # Per-instance memo over _intent_for; repeated phrasings resolve
+        # without rescanning (bound here so instances don't share state)
+        self._cached_intent = lru_cache(maxsize=256)(self._intent_for)
+
         logger.info("TaskManager initialized")
-    
+
+    # Precedence orders preserved from the original if/elif chains
+    _ACTION_PRECEDENCE = ("create", "list", "update", "complete", "delete")
+    _PRIORITY_PRECEDENCE = (TaskPriority.URGENT, TaskPriority.HIGH,
+                            TaskPriority.MEDIUM, TaskPriority.LOW)
+    _STATUS_PRECEDENCE = ("in_progress", "completed", "pending")
+    _DATE_PRECEDENCE = ("today", "tomorrow", "this_week")
+
+    def _build_intent_matcher(self) -> AhoCorasickMatcher:
+        """Build one automaton covering action/priority/status/date keywords"""
+
+        matcher = AhoCorasickMatcher()
+
+        for action, keywords in self.action_keywords.items():
+            for keyword in keywords:
+                matcher.add_word(keyword, ("action", action))
+
+        for keyword, priority in self._keyword_to_priority.items():
+            matcher.add_word(keyword, ("priority", priority))
+
+        for status_key, keywords in self.status_keywords.items():
+            for keyword in keywords:
+                matcher.add_word(keyword, ("status", status_key))
+
+        for date_key, keywords in self.date_keywords.items():
+            for keyword in keywords:
+                matcher.add_word(keyword, ("due_date", date_key))
+
+        matcher.compile()
+        return matcher
+
+    def _build_update_matcher(self) -> AhoCorasickMatcher:
+        """Build the automaton used by _extract_task_updates"""
+
+        matcher = AhoCorasickMatcher()
+
+        for keyword, priority in self._keyword_to_priority.items():
+            matcher.add_word(keyword, ("priority", priority))
+
+        for keyword, status in self._keyword_to_update_status.items():
+            matcher.add_word(keyword, ("status", status))
+
+        matcher.compile()
+        return matcher
+
     async def process_request(self, user_input: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Process task-related requests from user"""
-        
+
+        # Lowercase once and reuse across analysis/identification
+        user_input_lower = user_input.lower()
+
         # Intent analysis
-        intent = await self._analyze_task_intent(user_input)
-        
+        intent = await self._analyze_task_intent(user_input, user_input_lower)
+
         if intent["action"] == "create":
-            return await self._create_task_from_input(user_input, context)
+            return await self._create_task_from_input(user_input, context, user_input_lower)
         elif intent["action"] == "list":
             return await self._list_tasks(intent.get("filters", {}))
         elif intent["action"] == "update":
-            return await self._update_task_from_input(user_input, intent)
+            return await self._update_task_from_input(user_input, intent, user_input_lower)
         elif intent["action"] == "complete":
-            return await self._complete_task_from_input(user_input, intent)
+            return await self._complete_task_from_input(user_input, intent, user_input_lower)
         elif intent["action"] == "delete":
             return await self._delete_task_from_input(user_input, intent)
         else:
             return await self._general_task_assistance(user_input, context)
     
-    async def _analyze_task_intent(self, user_input: str) -> Dict[str, Any]:
+    async def _analyze_task_intent(self,
+                                   user_input: str,
+                                   user_input_lower: Optional[str] = None) -> Dict[str, Any]:
         """Analyze task-related intent"""
-        
-        user_input_lower = user_input.lower()
-        
+
+        if user_input_lower is None:
+            user_input_lower = user_input.lower()
+
+        # Fast path: exact stock phrasings skip the keyword scan entirely
+        fast_hit = self._fast_intents.get(user_input_lower.strip())
+        if fast_hit is not None:
+            action, filters = fast_hit
+            return {
+                "action": action,
+                "filters": dict(filters),
+                "confidence": 0.9
+            }
+
+        # Memoized: repeated phrasings skip the keyword sweep entirely
+        action, filter_items, confidence = self._cached_intent(user_input_lower)
+        return {
+            "action": action,
+            "filters": {
+                key: list(value) if isinstance(value, tuple) else value
+                for key, value in filter_items
+            },
+            "confidence": confidence
+        }
+
+    def _intent_for(self, user_input_lower: str) -> tuple:
+        """Resolve intent for a lowered input; pure, so safely cached
+
+        Returns (action, filter items, confidence) with hashable values
+        only — status lists are tuples here and converted back by the
+        caller — so results can live in the LRU cache.
+        """
+
+        # Single linear sweep tagging every keyword category at once
+        hits = self._intent_matcher.find_payloads(user_input_lower)
+
         # Action determination
-        if any(word in user_input_lower for word in ["create", "add", "new", "register", "todo"]):
-            action = "create"
-        elif any(word in user_input_lower for word in ["list", "show", "display", "view"]):
-            action = "list"
-        elif any(word in user_input_lower for word in ["update", "change", "modify", "edit"]):
-            action = "update"
-        elif any(word in user_input_lower for word in ["complete", "finish", "done"]):
-            action = "complete"
-        elif any(word in user_input_lower for word in ["delete", "remove", "cancel"]):
-            action = "delete"
-        else:
-            action = "general"
-        
+        action = next(
+            (a for a in self._ACTION_PRECEDENCE if ("action", a) in hits),
+            "general"
+        )
+
         # Filter extraction
         filters = {}
-        
+
         # Priority filter
-        for priority, keywords in self.priority_keywords.items():
-            if any(keyword in user_input_lower for keyword in keywords):
+        for priority in self._PRIORITY_PRECEDENCE:
+            if ("priority", priority) in hits:
                 filters["priority"] = priority
                 break
-        
+
         # Status filter
-        if "in progress" in user_input_lower or "working" in user_input_lower:
-            filters["status"] = TaskStatus.IN_PROGRESS
-        elif "completed" in user_input_lower:
-            filters["status"] = TaskStatus.COMPLETED
-        elif "pending" in user_input_lower or "remaining" in user_input_lower:
-            filters["status"] = [TaskStatus.PENDING, TaskStatus.IN_PROGRESS]
-        
+        for status_key in self._STATUS_PRECEDENCE:
+            if ("status", status_key) in hits:
+                if status_key == "in_progress":
+                    filters["status"] = TaskStatus.IN_PROGRESS
+                elif status_key == "completed":
+                    filters["status"] = TaskStatus.COMPLETED
+                else:  # pending
+                    filters["status"] = (TaskStatus.PENDING, TaskStatus.IN_PROGRESS)
+                break
+
         # Due date filter
-        if "today" in user_input_lower:
-            filters["due_date"] = "today"
-        elif "tomorrow" in user_input_lower:
-            filters["due_date"] = "tomorrow"
-        elif "this week" in user_input_lower:
-            filters["due_date"] = "this_week"
-        
-        return {
-            "action": action,
-            "filters": filters,
-            "confidence": 0.8
-        }
+        for date_key in self._DATE_PRECEDENCE:
+            if ("due_date", date_key) in hits:
+                filters["due_date"] = date_key
+                break
+
+        return action, tuple(filters.items()), 0.8
     
-    async def _create_task_from_input(self, user_input: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    async def _create_task_from_input(self,
+                                      user_input: str,
+                                      context: Optional[Dict[str, Any]] = None,
+                                      user_input_lower: Optional[str] = None) -> Dict[str, Any]:
         """Create task from user input"""
-        
-        # Extract task information using LLM
-        extraction_prompt = f"""
-        Extract task information from the following user input:
-        
-        Input: {user_input}
-        
-        Return JSON in the following format:
-        {{
-            "title": "Task title",
-            "description": "Detailed description (if any)",
-            "priority": "low/medium/high/urgent",
-            "due_date": "YYYY-MM-DD (if explicit date given)",
-            "tags": ["tag1", "tag2"],
-            "estimated_duration": "duration (e.g., 2 hours, 30 minutes)"
-        }}
-        """
-        
+
         try:
-            llm_response = await self.llm_provider.generate_response(extraction_prompt, context)
-            import json
-            task_info = json.loads(llm_response["content"])
-            
-            # Create task
-            task = await self.create_task(
-                title=task_info.get("title", "New Task"),
-                description=task_info.get("description"),
-                priority=TaskPriority(task_info.get("priority", "medium")),
-                due_date=self._parse_due_date(task_info.get("due_date")),
-                tags=task_info.get("tags", []),
-                estimated_duration=self._parse_duration(task_info.get("estimated_duration"))
-            )
-            
+            # Fast path: common phrasings are parsed locally; only fall
+            # back to LLM extraction for free-form requests
+            task_kwargs = self._fast_extract_task(user_input, user_input_lower)
+
+            if task_kwargs is None:
+                extraction_prompt = _EXTRACTION_PROMPT_TEMPLATE.format(user_input=user_input)
+                llm_response = await self.llm_provider.generate_response(extraction_prompt, context)
+                task_info = _json_loads(llm_response["content"])
+                task_kwargs = {
+                    "title": task_info.get("title", "New Task"),
+                    "description": task_info.get("description"),
+                    "priority": _PRIORITY_BY_VALUE.get(task_info.get("priority"), TaskPriority.MEDIUM),
+                    "due_date": self._parse_due_date(task_info.get("due_date")),
+                    "tags": task_info.get("tags", []),
+                    "estimated_duration": self._parse_duration(task_info.get("estimated_duration"))
+                }
+
+            task = await self.create_task(**task_kwargs)
+
             return {
                 "message": f"Created task: {task.title}",
                 "task_id": task.id,
@@ -194,7 +453,52 @@ class TaskManager:
                 "suggestions": ["Please provide specific task details"]
             }
     
-    async def create_task(self, 
+    def _fast_extract_task(self,
+                           user_input: str,
+                           user_input_lower: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Extract create_task arguments locally for common phrasings
+
+        Returns keyword arguments for create_task when the input matches
+        one of the precompiled patterns, or None when the phrasing is too
+        free-form and LLM extraction is needed.
+        """
+
+        match = None
+        for pattern in _FAST_CREATE_PATTERNS:
+            match = pattern.match(user_input.strip())
+            if match:
+                break
+        if not match:
+            return None
+
+        title = match.group("title").strip().strip('"「」')
+        if not title:
+            return None
+
+        groups = match.groupdict()
+
+        # Priority: the explicit "..., high priority" suffix wins; any
+        # priority keyword elsewhere in the input is picked up otherwise
+        priority = TaskPriority.MEDIUM
+        if groups.get("prio"):
+            priority = _PRIORITY_BY_VALUE.get(groups["prio"].lower(), TaskPriority.MEDIUM)
+        else:
+            if user_input_lower is None:
+                user_input_lower = user_input.lower()
+            hits = self._update_matcher.find_payloads(user_input_lower)
+            for candidate in self._PRIORITY_PRECEDENCE:
+                if ("priority", candidate) in hits:
+                    priority = candidate
+                    break
+
+        return {
+            "title": title,
+            "priority": priority,
+            "due_date": self._parse_due_date(groups.get("when")),
+            "estimated_duration": self._parse_duration(groups.get("dur"))
+        }
+
+    async def create_task(self,
                          title: str,
                          description: Optional[str] = None,
                          priority: TaskPriority = TaskPriority.MEDIUM,
@@ -202,10 +506,60 @@ class TaskManager:
                          tags: Optional[List[str]] = None,
                          estimated_duration: Optional[timedelta] = None) -> Task:
         """Create a new task"""
-        
-        import uuid
+
+        task = self._create_task_sync(title, description, priority,
+                                      due_date, tags, estimated_duration)
+
+        # The memory write is independent of the returned task; run it in
+        # the background so creation latency is just the dict insert
+        self._schedule_background_write(
+            self.memory_system.store_knowledge(
+                knowledge=f"Task created: {title}",
+                source="task_manager",
+                tags=["task", "created"] + (tags or []),
+                metadata={"task_id": task.id, "priority": priority.value}
+            )
+        )
+
+        logger.info(f"Task created: {task.id} - {title}")
+        return task
+
+    def _schedule_background_write(self, coroutine) -> None:
+        """Queue a side-effect coroutine without blocking the caller
+
+        A single worker drains the queue, so writes are applied in
+        submission order
+        """
+
+        if self._write_queue is None:
+            self._write_queue = asyncio.Queue()
+        self._write_queue.put_nowait(coroutine)
+
+        if self._write_worker is None or self._write_worker.done():
+            self._write_worker = asyncio.ensure_future(self._drain_background_writes())
+
+    async def _drain_background_writes(self) -> None:
+        """Apply queued background writes one at a time"""
+
+        while not self._write_queue.empty():
+            coroutine = self._write_queue.get_nowait()
+            try:
+                await coroutine
+            except Exception as e:
+                logger.error(f"Background memory write failed: {e}")
+
+    def _create_task_sync(self,
+                          title: str,
+                          description: Optional[str] = None,
+                          priority: TaskPriority = TaskPriority.MEDIUM,
+                          due_date: Optional[datetime] = None,
+                          tags: Optional[List[str]] = None,
+                          estimated_duration: Optional[timedelta] = None) -> Task:
+        """Insert a new task and update the indexes; no I/O involved"""
+
         task_id = str(uuid.uuid4())
-        
+
+        now = datetime.now()
         task = Task(
             id=task_id,
             title=title,
@@ -213,8 +567,8 @@ class TaskManager:
             status=TaskStatus.PENDING,
             priority=priority,
             due_date=due_date,
-            created_at=datetime.now(),
-            updated_at=datetime.now(),
+            created_at=now,
+            updated_at=now,
             completed_at=None,
             tags=tags or [],
             estimated_duration=estimated_duration,
@@ -225,49 +579,132 @@ class TaskManager:
         )
         
         self.tasks[task_id] = task
-        
-        # Store in memory system
-        await self.memory_system.store_knowledge(
-            knowledge=f"Task created: {title}",
-            source="task_manager",
-            tags=["task", "created"] + (tags or []),
-            metadata={"task_id": task_id, "priority": priority.value}
-        )
-        
-        logger.info(f"Task created: {task_id} - {title}")
+        self._lower_titles[task_id] = title.lower()
+        self._title_matcher_dirty = True
+        self._by_status[task.status].add(task_id)
+        self._by_priority[task.priority].add(task_id)
+        if due_date is not None:
+            bisect.insort(self._due_index, (due_date, task_id))
+        self._refresh_sort_key(task)
+
         return task
     
+    def _change_status(self, task: Task, new_status: TaskStatus) -> None:
+        """Move a task between status index buckets"""
+
+        if new_status != task.status:
+            self._by_status[task.status].discard(task.id)
+            task.status = new_status
+            self._by_status[new_status].add(task.id)
+
+            if new_status == TaskStatus.IN_PROGRESS and task.started_at is None:
+                task.started_at = datetime.now()
+
+    def _change_priority(self, task: Task, new_priority: TaskPriority) -> None:
+        """Move a task between priority index buckets"""
+
+        if new_priority != task.priority:
+            self._by_priority[task.priority].discard(task.id)
+            task.priority = new_priority
+            self._by_priority[new_priority].add(task.id)
+            self._refresh_sort_key(task)
+
+    def _change_due_date(self, task: Task, new_due: Optional[datetime]) -> None:
+        """Update a due date and keep the due-date index in order"""
+
+        if new_due == task.due_date:
+            return
+
+        if task.due_date is not None:
+            entry = (task.due_date, task.id)
+            index = bisect.bisect_left(self._due_index, entry)
+            if index < len(self._due_index) and self._due_index[index] == entry:
+                del self._due_index[index]
+
+        task.due_date = new_due
+        if new_due is not None:
+            bisect.insort(self._due_index, (new_due, task.id))
+        self._refresh_sort_key(task)
+
+    def _due_window_ids(self, due_filter: Any) -> Optional[set]:
+        """Resolve a date-window filter to task ids via the due index"""
+
+        if due_filter not in ("today", "tomorrow", "this_week"):
+            return None
+
+        today = datetime.now().date()
+        if due_filter == "today":
+            window_start = datetime.combine(today, datetime.min.time())
+            window_end = window_start + timedelta(days=1)
+        elif due_filter == "tomorrow":
+            window_start = datetime.combine(today + timedelta(days=1), datetime.min.time())
+            window_end = window_start + timedelta(days=1)
+        else:
+            # Anything due on or before today + 7 days, past dates included
+            window_start = datetime.min
+            window_end = datetime.combine(today + timedelta(days=8), datetime.min.time())
+
+        low = bisect.bisect_left(self._due_index, (window_start,))
+        high = bisect.bisect_left(self._due_index, (window_end,))
+        return {task_id for _, task_id in self._due_index[low:high]}
+
+    def _refresh_sort_key(self, task: Task) -> None:
+        """Recompute the cached listing sort key for a task"""
+
+        self._sort_keys[task.id] = (
+            task.priority.rank,
+            task.due_date.timestamp() if task.due_date else _NO_DUE_DATE,
+            task.created_at.timestamp()
+        )
+
     async def _list_tasks(self, filters: Dict[str, Any]) -> Dict[str, Any]:
         """Get task list"""
+
+        # Narrow via the status/priority indexes before per-task checks
+        candidate_ids = None
+
+        if "status" in filters:
+            statuses = filters["status"] if isinstance(filters["status"], list) else [filters["status"]]
+            candidate_ids = set().union(*(self._by_status[status] for status in statuses))
+
+        if "priority" in filters:
+            priority_ids = self._by_priority[filters["priority"]]
+            candidate_ids = priority_ids if candidate_ids is None else candidate_ids & priority_ids
+
+        if "due_date" in filters:
+            due_ids = self._due_window_ids(filters["due_date"])
+            if due_ids is not None:
+                candidate_ids = due_ids if candidate_ids is None else candidate_ids & due_ids
+
+        if candidate_ids is None:
+            candidates = self.tasks.values()
+        else:
+            candidates = (self.tasks[task_id] for task_id in candidate_ids)
+
+        # One clock read for the whole listing, not one per task
+        today = datetime.now().date() if "due_date" in filters else None
+
+        filtered_tasks = [
+            task for task in candidates
+            if self._task_matches_filters(task, filters, today)
+        ]
         
-        filtered_tasks = []
-        
-        for task in self.tasks.values():
-            # Apply filters
-            if not self._task_matches_filters(task, filters):
-                continue
-            filtered_tasks.append(task)
-        
-        # Sort by priority and due date
-        filtered_tasks.sort(key=lambda t: (
-            t.priority.value,
-            t.due_date or datetime.max,
-            t.created_at
-        ))
+        # Sort by priority and due date via the precomputed keys
+        filtered_tasks.sort(key=lambda task: self._sort_keys[task.id])
         
         # Format results
         if not filtered_tasks:
             message = "No matching tasks found."
         else:
-            task_list = []
-            for task in filtered_tasks[:10]:  # Max 10 items
-                due_str = task.due_date.strftime("%m/%d") if task.due_date else "No deadline"
-                status_emoji = self._get_status_emoji(task.status)
-                priority_emoji = self._get_priority_emoji(task.priority)
-                
-                task_list.append(f"{status_emoji} {priority_emoji} {task.title} (Due: {due_str})")
-            
-            message = f"Task List ({len(filtered_tasks)} items):\n" + "\n".join(task_list)
+            message = f"Task List ({len(filtered_tasks)} items):\n" + "\n".join(
+                _ROW_FORMAT.format(
+                    status=_STATUS_EMOJI.get(task.status, "📝"),
+                    priority=_PRIORITY_EMOJI.get(task.priority, "⚪"),
+                    title=task.title,
+                    due=task.due_date.strftime("%m/%d") if task.due_date else "No deadline"
+                )
+                for task in filtered_tasks[:10]  # Max 10 items
+            )
         
         return {
             "message": message,
@@ -284,34 +721,44 @@ class TaskManager:
         
         if task_id not in self.tasks:
             return False
-        
+
         task = self.tasks[task_id]
-        task.status = TaskStatus.COMPLETED
-        task.completed_at = datetime.now()
-        task.updated_at = datetime.now()
-        
-        # Calculate actual duration
-        if task.status == TaskStatus.IN_PROGRESS:
-            # Since start time is not recorded, use estimate
-            task.actual_duration = datetime.now() - task.updated_at
-        
+
+        # One clock read stamps duration, completed_at and updated_at
+        now = datetime.now()
+
+        # Actual duration runs from the recorded work start; read before
+        # the status/timestamps are overwritten below
+        if task.status == TaskStatus.IN_PROGRESS and task.started_at is not None:
+            task.actual_duration = now - task.started_at
+
+        self._change_status(task, TaskStatus.COMPLETED)
+        task.completed_at = now
+        task.updated_at = now
+
         logger.info(f"Task completed: {task_id} - {task.title}")
         return True
     
-    async def _update_task_from_input(self, user_input: str, intent: Dict[str, Any]) -> Dict[str, Any]:
+    async def _update_task_from_input(self,
+                                      user_input: str,
+                                      intent: Dict[str, Any],
+                                      user_input_lower: Optional[str] = None) -> Dict[str, Any]:
         """Update task from user input"""
-        
+
+        if user_input_lower is None:
+            user_input_lower = user_input.lower()
+
         # Identify task
-        task = await self._identify_task_from_input(user_input)
+        task = await self._identify_task_from_input(user_input, user_input_lower)
         if not task:
             return {
                 "message": "Could not identify task to update. Please specify task name clearly.",
                 "actions": [],
                 "suggestions": ["Check existing task list?"]
             }
-        
+
         # Extract update content
-        updates = await self._extract_task_updates(user_input)
+        updates = await self._extract_task_updates(user_input, user_input_lower)
         
         # Update task
         original_title = task.title
@@ -319,6 +766,8 @@ class TaskManager:
         
         if "title" in updates:
             task.title = updates["title"]
+            self._lower_titles[task.id] = task.title.lower()
+            self._title_matcher_dirty = True
             updated_fields.append("title")
         
         if "description" in updates:
@@ -326,15 +775,15 @@ class TaskManager:
             updated_fields.append("description")
         
         if "priority" in updates:
-            task.priority = TaskPriority(updates["priority"])
+            self._change_priority(task, _PRIORITY_BY_VALUE.get(updates["priority"], TaskPriority.MEDIUM))
             updated_fields.append("priority")
         
         if "due_date" in updates:
-            task.due_date = self._parse_due_date(updates["due_date"])
+            self._change_due_date(task, self._parse_due_date(updates["due_date"]))
             updated_fields.append("due_date")
         
         if "status" in updates:
-            task.status = TaskStatus(updates["status"])
+            self._change_status(task, _STATUS_BY_VALUE.get(updates["status"], task.status))
             updated_fields.append("status")
         
         task.updated_at = datetime.now()
@@ -346,10 +795,13 @@ class TaskManager:
             "suggestions": ["Any other updates needed?"]
         }
     
-    async def _complete_task_from_input(self, user_input: str, intent: Dict[str, Any]) -> Dict[str, Any]:
+    async def _complete_task_from_input(self,
+                                        user_input: str,
+                                        intent: Dict[str, Any],
+                                        user_input_lower: Optional[str] = None) -> Dict[str, Any]:
         """Process task completion"""
-        
-        task = await self._identify_task_from_input(user_input)
+
+        task = await self._identify_task_from_input(user_input, user_input_lower)
         if not task:
             return {
                 "message": "Could not identify task to complete.",
@@ -374,11 +826,7 @@ class TaskManager:
         """General task assistance"""
         
         # Generate task analysis and advice
-        analysis_prompt = f"""
-        Task-related question from user: {user_input}
-        
-        Considering current task situation, generate useful advice or suggestions.
-        """
+        analysis_prompt = _ASSISTANCE_PROMPT_TEMPLATE.format(user_input=user_input)
         
         try:
             llm_response = await self.llm_provider.generate_response(analysis_prompt, context)
@@ -404,40 +852,117 @@ class TaskManager:
                 ]
             }
     
-    async def _identify_task_from_input(self, user_input: str) -> Optional[Task]:
+    async def _identify_task_from_input(self,
+                                        user_input: str,
+                                        user_input_lower: Optional[str] = None) -> Optional[Task]:
         """Identify task from user input"""
-        
-        # Partial matching with task titles
-        for task in self.tasks.values():
-            if task.title.lower() in user_input.lower() or user_input.lower() in task.title.lower():
-                return task
-        
+
+        if user_input_lower is None:
+            user_input_lower = user_input.lower()
+
+        if self._title_matcher_dirty:
+            self._rebuild_title_matcher()
+
+        # One linear pass over the input; the longest matching title wins
+        best_task_id = None
+        best_length = 0
+        for start, end, task_id in self._title_matcher.iter_matches(user_input_lower):
+            if end - start > best_length:
+                best_length = end - start
+                best_task_id = task_id
+
+        if best_task_id is not None:
+            return self.tasks[best_task_id]
+
+        # Fallback: the input itself may be a fragment of a title. Whole
+        # sentences are never title fragments, so only run this reverse
+        # scan when the input is short enough to plausibly be one.
+        if len(user_input_lower) <= 20:
+            # Whole-word fragments resolve through the token index in O(1)
+            for token in _TOKEN_PATTERN.findall(user_input_lower):
+                for task_id in self._title_tokens.get(token, ()):
+                    if user_input_lower in self._lower_titles[task_id]:
+                        return self.tasks[task_id]
+
+            for task_id, lower_title in self._lower_titles.items():
+                if user_input_lower in lower_title:
+                    return self.tasks[task_id]
+
         return None
-    
-    async def _extract_task_updates(self, user_input: str) -> Dict[str, Any]:
+
+    def _rebuild_title_matcher(self) -> None:
+        """Rebuild the title automaton after the title set changed"""
+
+        matcher = AhoCorasickMatcher()
+        token_index: Dict[str, set] = {}
+        for task_id, lower_title in self._lower_titles.items():
+            matcher.add_word(lower_title, task_id)
+            for token in _TOKEN_PATTERN.findall(lower_title):
+                token_index.setdefault(token, set()).add(task_id)
+        matcher.compile()
+
+        self._title_matcher = matcher
+        self._title_tokens = token_index
+        self._sorted_titles = sorted(self._lower_titles.values())
+        self._title_matcher_dirty = False
+
+    def suggest_titles(self, prefix: str, limit: int = 5) -> List[str]:
+        """Suggest task titles starting with the given prefix
+
+        Prefix candidates come from a bisect slice of the sorted lowered
+        titles, so suggestions cost O(log n + hits) per keystroke.
+        """
+
+        prefix = prefix.lower()
+        if not prefix:
+            return []
+
+        if self._title_matcher_dirty:
+            self._rebuild_title_matcher()
+
+        start = bisect.bisect_left(self._sorted_titles, prefix)
+        suggestions = []
+        for lower_title in self._sorted_titles[start:start + limit]:
+            if not lower_title.startswith(prefix):
+                break
+            suggestions.append(lower_title)
+        return suggestions
+
+    async def _extract_task_updates(self,
+                                    user_input: str,
+                                    user_input_lower: Optional[str] = None) -> Dict[str, Any]:
         """Extract update content"""
-        
+
         updates = {}
-        user_input_lower = user_input.lower()
-        
+        if user_input_lower is None:
+            user_input_lower = user_input.lower()
+
+        # One automaton sweep tags priority and status keywords together
+        hits = self._update_matcher.find_payloads(user_input_lower)
+
         # Priority updates
-        for priority, keywords in self.priority_keywords.items():
-            if any(keyword in user_input_lower for keyword in keywords):
+        for priority in self._PRIORITY_PRECEDENCE:
+            if ("priority", priority) in hits:
                 updates["priority"] = priority.value
                 break
-        
+
         # Status updates
-        if "start" in user_input_lower or "begin" in user_input_lower:
-            updates["status"] = TaskStatus.IN_PROGRESS.value
-        elif "complete" in user_input_lower:
-            updates["status"] = TaskStatus.COMPLETED.value
-        elif "pause" in user_input_lower or "hold" in user_input_lower:
-            updates["status"] = TaskStatus.PAUSED.value
-        
+        for status in (TaskStatus.IN_PROGRESS, TaskStatus.COMPLETED, TaskStatus.PAUSED):
+            if ("status", status) in hits:
+                updates["status"] = status.value
+                break
+
         return updates
     
-    def _task_matches_filters(self, task: Task, filters: Dict[str, Any]) -> bool:
-        """Check if task matches filter conditions"""
+    def _task_matches_filters(self,
+                              task: Task,
+                              filters: Dict[str, Any],
+                              today: Optional[Any] = None) -> bool:
+        """Check if task matches filter conditions
+
+        _list_tasks resolves today's date once and passes it in so the
+        per-task check does no clock reads of its own.
+        """
         
         # Priority filter
         if "priority" in filters and task.priority != filters["priority"]:
@@ -453,7 +978,8 @@ class TaskManager:
         
         # Due date filter
         if "due_date" in filters:
-            today = datetime.now().date()
+            if today is None:
+                today = datetime.now().date()
             if filters["due_date"] == "today":
                 if not task.due_date or task.due_date.date() != today:
                     return False
@@ -473,75 +999,65 @@ class TaskManager:
         
         if not date_str:
             return None
-        
+
+        # Explicit ISO dates go through the C-level parser directly
         try:
-            return datetime.strptime(date_str, "%Y-%m-%d")
+            return datetime.fromisoformat(date_str)
         except ValueError:
-            # Handle relative dates
-            today = datetime.now()
-            if "today" in date_str:
-                return today
-            elif "tomorrow" in date_str:
-                return today + timedelta(days=1)
-            elif "next week" in date_str:
-                return today + timedelta(days=7)
-            else:
-                return None
+            pass
+
+        # Handle relative dates
+        today = datetime.now()
+        if "today" in date_str or "今日" in date_str:
+            return today
+        elif "tomorrow" in date_str or "明日" in date_str:
+            return today + timedelta(days=1)
+        elif "next week" in date_str or "来週" in date_str:
+            return today + timedelta(days=7)
+        else:
+            return None
     
     def _parse_duration(self, duration_str: Optional[str]) -> Optional[timedelta]:
         """Parse duration string"""
         
         if not duration_str:
             return None
-        
-        # Pattern matching for duration
-        import re
-        hour_match = re.search(r'(\d+)\s*hour', duration_str)
-        minute_match = re.search(r'(\d+)\s*minute', duration_str)
-        
-        hours = int(hour_match.group(1)) if hour_match else 0
-        minutes = int(minute_match.group(1)) if minute_match else 0
-        
+
+        # Fast reject: nothing to parse without a digit
+        if not any(char.isdigit() for char in duration_str):
+            return None
+
+        # Both units come out of a single scan over the string
+        hours = 0
+        minutes = 0
+        for match in _DURATION_PATTERN.finditer(duration_str):
+            if match.lastgroup == "hours":
+                hours += int(match.group("hours"))
+            else:
+                minutes += int(match.group("minutes"))
+
         if hours > 0 or minutes > 0:
             return timedelta(hours=hours, minutes=minutes)
-        
+
         return None
-    
-    def _get_status_emoji(self, status: TaskStatus) -> str:
-        """Get status emoji"""
-        emoji_map = {
-            TaskStatus.PENDING: "⏳",
-            TaskStatus.IN_PROGRESS: "🔄",
-            TaskStatus.COMPLETED: "✅",
-            TaskStatus.CANCELLED: "❌",
-            TaskStatus.PAUSED: "⏸️"
-        }
-        return emoji_map.get(status, "📝")
-    
-    def _get_priority_emoji(self, priority: TaskPriority) -> str:
-        """Get priority emoji"""
-        emoji_map = {
-            TaskPriority.LOW: "🟢",
-            TaskPriority.MEDIUM: "🟡",
-            TaskPriority.HIGH: "🟠",
-            TaskPriority.URGENT: "🔴"
-        }
-        return emoji_map.get(priority, "⚪")
-    
+
     async def get_task_analytics(self) -> Dict[str, Any]:
-        """Get task analytics information"""
+        """Get task analytics information
+
+        Reads the maintained status/priority index sizes; no pass over
+        self.tasks — fused or otherwise — is needed regardless of count
+        """
         
         total_tasks = len(self.tasks)
-        completed_tasks = len([t for t in self.tasks.values() if t.status == TaskStatus.COMPLETED])
-        pending_tasks = len([t for t in self.tasks.values() if t.status == TaskStatus.PENDING])
-        in_progress_tasks = len([t for t in self.tasks.values() if t.status == TaskStatus.IN_PROGRESS])
-        
-        # Priority statistics
-        priority_stats = {}
-        for priority in TaskPriority:
-            priority_stats[priority.value] = len([
-                t for t in self.tasks.values() if t.priority == priority
-            ])
+        completed_tasks = len(self._by_status[TaskStatus.COMPLETED])
+        pending_tasks = len(self._by_status[TaskStatus.PENDING])
+        in_progress_tasks = len(self._by_status[TaskStatus.IN_PROGRESS])
+
+        # Priority statistics straight from the index sizes
+        priority_stats = {
+            priority.value: len(self._by_priority[priority])
+            for priority in TaskPriority
+        }
         
         return {
             "total_tasks": total_tasks,
@@ -1,5 +1,5 @@
 """
-Personal AI Agent - ����ƣ����
+Personal AI Agent - セキュリティモジュール
 """
 
 from .encryption import EncryptionManager, SecureStorage, DataProtectionManager
@@ -20,4 +20,4 @@ __all__ = [
     "DataType",
     "ProcessingPurpose",
     "ConsentStatus"
-]
\ No newline at end of file
+]
@@ -5,9 +5,16 @@ Personal AI Agent - 認証・認可システム
 
 import os
 import jwt
+import json
+import base64
+import hmac
 import logging
+import threading
+import time
 from datetime import datetime, timedelta
 from typing import Dict, Optional, Any, List
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from enum import Enum
 import hashlib
@@ -33,6 +40,13 @@ class Permission(Enum):
     ADMIN = "admin"
     SYSTEM = "system"
 
+# 役割ごとのデフォルト権限 (不変なのでモジュールロード時に確定)
+_DEFAULT_PERMISSIONS = {
+    UserRole.ADMIN: (Permission.READ, Permission.WRITE, Permission.DELETE, Permission.ADMIN),
+    UserRole.USER: (Permission.READ, Permission.WRITE),
+    UserRole.GUEST: (Permission.READ,)
+}
+
 @dataclass
 class User:
     """ユーザー情報"""
@@ -56,6 +70,8 @@ class Session:
     ip_address: Optional[str]
     user_agent: Optional[str]
     is_active: bool
+    # 期限比較用の monotonic 秒。datetime は表示・永続化用に残す
+    expires_at_monotonic: Optional[float] = None
 
 class AuthenticationManager:
     """
@@ -70,12 +86,40 @@ class AuthenticationManager:
         
         # セッション管理
         self.active_sessions: Dict[str, Session] = {}
-        self.failed_attempts: Dict[str, List[datetime]] = {}
+
+        # 失敗試行は monotonic 秒の deque で保持し、期限切れは
+        # 先頭から O(1) で落とす
+        self.failed_attempts: Dict[str, deque] = {}
+
+        # セッションは参照時に遅延削除し、作成 N 回ごとに全体を掃除して
+        # 長時間稼働でも辞書が無制限に育たないようにする
+        self._session_sweep_every = 256
+        self._sessions_since_sweep = 0
+
+        # 検証済みトークンの短期キャッシュ
+        # 生トークンは保持せず SHA-256 ハッシュをキーにする。
+        # 検証失敗はキャッシュしない
+        self._token_cache: Dict[bytes, tuple] = {}
+        self._token_cache_lock = threading.Lock()
+        self._token_cache_ttl = 15.0
+        self._token_cache_max = 10000
+
+        # 一括検証用スレッドプール (初回利用時に生成)
+        self._verify_pool: Optional[ThreadPoolExecutor] = None
         
         # JWT設定
         self.jwt_algorithm = "HS256"
         self.access_token_expire = timedelta(minutes=config.jwt_expire_minutes)
         self.refresh_token_expire = timedelta(days=7)
+
+        # 署名用の固定ヘッダーと HMAC 初期状態は一度だけ構築し、
+        # トークン生成ごとに copy() して使い回す
+        self._jwt_header_b64 = base64.urlsafe_b64encode(
+            b'{"alg":"HS256","typ":"JWT"}'
+        ).rstrip(b'=')
+        self._hmac_template = hmac.new(
+            config.secret_key.encode(), digestmod=hashlib.sha256
+        )
         
         logger.info("AuthenticationManager initialized")
     
@@ -86,8 +130,8 @@ class AuthenticationManager:
                    role: UserRole = UserRole.USER) -> User:
         """新しいユーザーを作成"""
         
-        # パスワードハッシュ化
-        password_hash, salt = self.encryption_manager.hash_password(password)
+        # パスワードハッシュ化 (bcrypt; ソルトはハッシュ文字列に内包)
+        password_hash = self.encryption_manager.hash_password(password)
         
         # ユーザーID生成
         user_id = secrets.token_urlsafe(16)
@@ -106,7 +150,6 @@ class AuthenticationManager:
             is_active=True,
             metadata={
                 "password_hash": password_hash,
-                "salt": salt,
                 "created_by": "system"
             }
         )
@@ -131,17 +174,24 @@ class AuthenticationManager:
             self._record_failed_attempt(username, ip_address)
             return None
         
-        # パスワード検証
+        # パスワード検証 (salt があれば旧 PBKDF2 形式)
         if not self.encryption_manager.verify_password(
-            password, 
-            user.metadata["password_hash"], 
-            user.metadata["salt"]
+            password,
+            user.metadata["password_hash"],
+            user.metadata.get("salt")
         ):
             self._record_failed_attempt(username, ip_address)
             return None
-        
+
         # 認証成功
         user.last_login = datetime.now()
+
+        # 旧形式または旧パラメータのハッシュは認証成功時に更新
+        if "salt" in user.metadata or self.encryption_manager.password_needs_rehash(
+            user.metadata["password_hash"]
+        ):
+            user.metadata["password_hash"] = self.encryption_manager.hash_password(password)
+            user.metadata.pop("salt", None)
         
         # トークン生成
         access_token = self._generate_access_token(user)
@@ -151,32 +201,74 @@ class AuthenticationManager:
         return user, access_token, refresh_token
     
     def verify_token(self, token: str) -> Optional[Dict[str, Any]]:
-        """JWT トークンの検証"""
-        
+        """JWT トークンの検証
+
+        検証済みペイロードを短時間キャッシュし、同一クライアントからの
+        連続リクエストで署名検証を繰り返さない。キャッシュヒット時も
+        exp は毎回確認する
+        """
+
+        cache_key = hashlib.sha256(token.encode()).digest()[:16]
+        now = time.monotonic()
+
+        with self._token_cache_lock:
+            entry = self._token_cache.get(cache_key)
+            if entry is not None:
+                payload, cached_until = entry
+                if now < cached_until and datetime.fromtimestamp(payload["exp"]) >= datetime.now():
+                    return payload
+                del self._token_cache[cache_key]
+
         try:
+            # exp の検証は jwt.decode が行うため手動チェックは不要。
+            # 必須クレームの存在もここでまとめて強制する
             payload = jwt.decode(
-                token, 
-                self.config.secret_key, 
-                algorithms=[self.jwt_algorithm]
+                token,
+                self.config.secret_key,
+                algorithms=[self.jwt_algorithm],
+                options={"require": ["exp", "user_id", "session_id", "type"]}
             )
-            
-            # トークンの有効期限チェック
-            if datetime.fromtimestamp(payload["exp"]) < datetime.now():
-                return None
-            
+
+            with self._token_cache_lock:
+                if len(self._token_cache) >= self._token_cache_max:
+                    self._token_cache.clear()
+                self._token_cache[cache_key] = (payload, now + self._token_cache_ttl)
+
             return payload
-            
+
         except jwt.InvalidTokenError:
             return None
     
+    def verify_tokens_batch(self, tokens: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """複数の JWT トークンをまとめて検証
+
+        HMAC-SHA256 の C 実装はハッシュ計算中に GIL を解放するため、
+        スレッドプールに分配すると複数コアで署名検証が重なる。
+        結果は入力と同じ順序で返す
+        """
+
+        if not tokens:
+            return []
+        if len(tokens) == 1:
+            return [self.verify_token(tokens[0])]
+
+        if self._verify_pool is None:
+            self._verify_pool = ThreadPoolExecutor(
+                max_workers=min(4, os.cpu_count() or 1),
+                thread_name_prefix="jwt-verify"
+            )
+
+        return list(self._verify_pool.map(self.verify_token, tokens))
+
     def refresh_access_token(self, refresh_token: str) -> Optional[str]:
         """アクセストークンの更新"""
         
         try:
             payload = jwt.decode(
-                refresh_token, 
-                self.config.secret_key, 
-                algorithms=[self.jwt_algorithm]
+                refresh_token,
+                self.config.secret_key,
+                algorithms=[self.jwt_algorithm],
+                options={"require": ["exp", "user_id", "type"]}
             )
             
             if payload.get("type") != "refresh":
@@ -215,103 +307,165 @@ class AuthenticationManager:
         """セッション作成"""
         
         session_id = secrets.token_urlsafe(32)
-        
+
+        now = datetime.now()
         session = Session(
             session_id=session_id,
             user_id=user.user_id,
-            created_at=datetime.now(),
-            expires_at=datetime.now() + self.access_token_expire,
+            created_at=now,
+            expires_at=now + self.access_token_expire,
             ip_address=ip_address,
             user_agent=user_agent,
-            is_active=True
+            is_active=True,
+            expires_at_monotonic=time.monotonic() + self.access_token_expire.total_seconds()
         )
         
         self.active_sessions[session_id] = session
+
+        self._sessions_since_sweep += 1
+        if self._sessions_since_sweep >= self._session_sweep_every:
+            self._sweep_sessions()
+
         return session
-    
+
     def get_active_session(self, session_id: str) -> Optional[Session]:
         """アクティブセッション取得"""
-        
+
         session = self.active_sessions.get(session_id)
-        if session and session.is_active and session.expires_at > datetime.now():
-            return session
-        
-        return None
+        if session is None:
+            return None
+
+        if not session.is_active or self._session_expired(session):
+            # 期限切れ・無効化済みセッションは参照時に破棄
+            del self.active_sessions[session_id]
+            return None
+
+        return session
+
+    @staticmethod
+    def _session_expired(session: Session) -> bool:
+        """期限切れ判定 (monotonic 秒の float 比較のみ)"""
+
+        if session.expires_at_monotonic is not None:
+            return session.expires_at_monotonic <= time.monotonic()
+        return session.expires_at <= datetime.now()
+
+    def _sweep_sessions(self) -> None:
+        """期限切れ・無効化済みセッションをまとめて破棄"""
+
+        expired = [
+            session_id for session_id, session in self.active_sessions.items()
+            if not session.is_active or self._session_expired(session)
+        ]
+        for session_id in expired:
+            del self.active_sessions[session_id]
+
+        self._sessions_since_sweep = 0
+        if expired:
+            logger.debug(f"Swept {len(expired)} expired sessions")
     
+    def _encode_jwt(self, payload: Dict[str, Any]) -> str:
+        """HS256 JWT を生成
+
+        ヘッダーの base64 と HMAC の鍵展開は __init__ で済ませてあり、
+        生成ごとの仕事はペイロードのシリアライズと digest のみ。
+        検証側は従来どおり jwt.decode を使う
+        """
+
+        payload_b64 = base64.urlsafe_b64encode(
+            json.dumps(payload, separators=(",", ":")).encode('utf-8')
+        ).rstrip(b'=')
+
+        signing_input = self._jwt_header_b64 + b'.' + payload_b64
+        mac = self._hmac_template.copy()
+        mac.update(signing_input)
+        signature_b64 = base64.urlsafe_b64encode(mac.digest()).rstrip(b'=')
+
+        return (signing_input + b'.' + signature_b64).decode('ascii')
+
+    @staticmethod
+    def _encoded_permissions(user: User) -> tuple:
+        """権限値のエンコード結果を User インスタンス上にキャッシュ
+
+        権限を変更するコードは _encoded_permissions_cache 属性を削除して
+        キャッシュを無効化すること
+        """
+
+        cached = getattr(user, "_encoded_permissions_cache", None)
+        if cached is None:
+            cached = tuple(p.value for p in user.permissions)
+            user._encoded_permissions_cache = cached
+        return cached
+
     def _generate_access_token(self, user: User) -> str:
         """アクセストークン生成"""
-        
+
         session = self.create_session(user)
-        
+        now = datetime.now()
+
         payload = {
             "user_id": user.user_id,
             "username": user.username,
             "role": user.role.value,
-            "permissions": [p.value for p in user.permissions],
+            "permissions": self._encoded_permissions(user),
             "session_id": session.session_id,
             "type": "access",
-            "iat": datetime.now(),
-            "exp": datetime.now() + self.access_token_expire
+            "iat": int(now.timestamp()),
+            "exp": int((now + self.access_token_expire).timestamp())
         }
-        
-        return jwt.encode(payload, self.config.secret_key, algorithm=self.jwt_algorithm)
-    
+
+        return self._encode_jwt(payload)
+
     def _generate_refresh_token(self, user: User) -> str:
         """リフレッシュトークン生成"""
-        
+
+        now = datetime.now()
         payload = {
             "user_id": user.user_id,
             "username": user.username,
             "type": "refresh",
-            "iat": datetime.now(),
-            "exp": datetime.now() + self.refresh_token_expire
+            "iat": int(now.timestamp()),
+            "exp": int((now + self.refresh_token_expire).timestamp())
         }
-        
-        return jwt.encode(payload, self.config.secret_key, algorithm=self.jwt_algorithm)
+
+        return self._encode_jwt(payload)
     
     def _get_default_permissions(self, role: UserRole) -> List[Permission]:
         """役割に基づくデフォルト権限"""
-        
-        if role == UserRole.ADMIN:
-            return [Permission.READ, Permission.WRITE, Permission.DELETE, Permission.ADMIN]
-        elif role == UserRole.USER:
-            return [Permission.READ, Permission.WRITE]
-        else:  # GUEST
-            return [Permission.READ]
+
+        # User.permissions は可変リストなのでコピーを返す
+        return list(_DEFAULT_PERMISSIONS[role])
     
+    _RATE_LIMIT_WINDOW = 900.0  # 15分 (秒)
+
     def _check_rate_limit(self, username: str, ip_address: Optional[str]) -> bool:
         """レート制限チェック"""
-        
+
         key = ip_address or username
-        now = datetime.now()
-        window = timedelta(minutes=15)
-        
-        if key not in self.failed_attempts:
+        attempts = self.failed_attempts.get(key)
+        if attempts is None:
             return True
-        
-        # 15分以内の失敗試行をカウント
-        recent_attempts = [
-            attempt for attempt in self.failed_attempts[key]
-            if now - attempt < window
-        ]
-        
-        return len(recent_attempts) < self.config.max_login_attempts
-    
+
+        self._prune_attempts(attempts, time.monotonic())
+        return len(attempts) < self.config.max_login_attempts
+
     def _record_failed_attempt(self, username: str, ip_address: Optional[str]) -> None:
         """失敗試行を記録"""
-        
+
         key = ip_address or username
-        if key not in self.failed_attempts:
-            self.failed_attempts[key] = []
-        
-        self.failed_attempts[key].append(datetime.now())
-        
-        # 古い記録をクリーンアップ
-        window = timedelta(minutes=15)
-        self.failed_attempts[key] = [
-            attempt for attempt in self.failed_attempts[key]
-            if datetime.now() - attempt < window
-        ]
+        now = time.monotonic()
+
+        attempts = self.failed_attempts.setdefault(key, deque())
+        attempts.append(now)
+        self._prune_attempts(attempts, now)
+
+    @staticmethod
+    def _prune_attempts(attempts: deque, now: float) -> None:
+        """ウィンドウ外の失敗記録を先頭から破棄"""
+
+        cutoff = now - AuthenticationManager._RATE_LIMIT_WINDOW
+        while attempts and attempts[0] < cutoff:
+            attempts.popleft()
     
     def _find_user_by_username(self, username: str) -> Optional[User]:
         """ユーザー名でユーザー検索（模擬実装）"""
@@ -331,32 +485,47 @@ class AuthorizationManager:
     """
     
     def __init__(self):
-        self.resource_permissions: Dict[str, List[Permission]] = {}
+        self.resource_permissions: Dict[str, frozenset] = {}
         logger.info("AuthorizationManager initialized")
-    
+
     def register_resource(self, resource: str, required_permissions: List[Permission]) -> None:
         """リソースに必要な権限を登録"""
-        self.resource_permissions[resource] = required_permissions
-    
+        self.resource_permissions[resource] = frozenset(required_permissions)
+
+    @staticmethod
+    def _permission_set(user: User) -> frozenset:
+        """ユーザー権限の set 表現を User 上にキャッシュ
+
+        権限を変更するコードは _permission_set_cache 属性を削除して
+        キャッシュを無効化すること
+        """
+
+        cached = getattr(user, "_permission_set_cache", None)
+        if cached is None:
+            cached = frozenset(user.permissions)
+            user._permission_set_cache = cached
+        return cached
+
     def check_permission(self, user: User, resource: str, action: Permission) -> bool:
         """ユーザーの権限をチェック"""
-        
+
         # ユーザーがアクティブかチェック
         if not user.is_active:
             return False
-        
+
+        user_permissions = self._permission_set(user)
+
         # 管理者は全権限を持つ
-        if Permission.ADMIN in user.permissions:
+        if Permission.ADMIN in user_permissions:
             return True
-        
+
         # リソース固有の権限チェック
-        if resource in self.resource_permissions:
-            required_permissions = self.resource_permissions[resource]
-            if action not in required_permissions:
-                return True  # 権限が不要なアクション
-        
+        required_permissions = self.resource_permissions.get(resource)
+        if required_permissions is not None and action not in required_permissions:
+            return True  # 権限が不要なアクション
+
         # ユーザーが必要な権限を持っているかチェック
-        return action in user.permissions
+        return action in user_permissions
     
     def require_permission(self, resource: str, action: Permission):
         """権限チェックデコレータ"""
@@ -446,18 +615,35 @@ class SecurityConfig:
             "Referrer-Policy": "strict-origin-when-cross-origin"
         }
     
+    _SPECIAL_CHARS = frozenset("!@#$%^&*(),.?\":{}|<>")
+
     @staticmethod
     def validate_password_strength(password: str) -> Dict[str, Any]:
         """パスワード強度チェック"""
-        
+
+        # 文字種ごとに any() で走査し直さず一回のループで全チェック
+        has_upper = has_lower = has_digit = has_special = False
+        special_chars = SecurityConfig._SPECIAL_CHARS
+        for c in password:
+            if c.isupper():
+                has_upper = True
+            elif c.islower():
+                has_lower = True
+            elif c.isdigit():
+                has_digit = True
+            elif c in special_chars:
+                has_special = True
+            if has_upper and has_lower and has_digit and has_special:
+                break
+
         checks = {
             "length": len(password) >= 8,
-            "uppercase": any(c.isupper() for c in password),
-            "lowercase": any(c.islower() for c in password),
-            "digit": any(c.isdigit() for c in password),
-            "special": any(c in "!@#$%^&*(),.?\":{}|<>" for c in password)
+            "uppercase": has_upper,
+            "lowercase": has_lower,
+            "digit": has_digit,
+            "special": has_special
         }
-        
+
         score = sum(checks.values())
         
         return {
@@ -5,17 +5,41 @@ Personal AI Agent - データ暗号化システム
 
 import os
 import base64
+import hashlib
+import hmac
 import logging
+import re
 from typing import Dict, Optional, Union, Any
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, MultiFernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.backends import default_backend
+from passlib.context import CryptContext
 import secrets
 
+try:
+    import orjson
+
+    def _json_dumps(data: Any, default=None) -> str:
+        return orjson.dumps(data, default=default).decode('utf-8')
+
+    _json_loads = orjson.loads
+except ImportError:
+    import json
+
+    def _json_dumps(data: Any, default=None) -> str:
+        return json.dumps(data, ensure_ascii=False, default=default)
+
+    _json_loads = json.loads
+
 logger = logging.getLogger(__name__)
 
+# パスワードハッシュ用コンテキスト。bcrypt はソルトとコストを
+# ハッシュ文字列に埋め込むため、別途ソルトを保持する必要がない
+_password_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
 class EncryptionManager:
     """
     データ暗号化管理システム
@@ -38,21 +62,61 @@ class EncryptionManager:
         """暗号化システムの初期化"""
         
         if self.master_key:
-            # マスターキーから暗号化キーを導出
+            # マスターキーから暗号化キーを導出 (scrypt)。
+            # 旧 PBKDF2 導出キーでも復号できるよう MultiFernet を使い、
+            # 新規の暗号化は先頭の scrypt キーで行う
             self.fernet_key = self._derive_key_from_master(self.master_key)
+            legacy_key = self._derive_legacy_key(self.master_key)
+            self.cipher_suite = MultiFernet([
+                Fernet(self.fernet_key),
+                Fernet(legacy_key)
+            ])
         else:
             # 新しいキーを生成
             self.fernet_key = Fernet.generate_key()
-        
-        self.cipher_suite = Fernet(self.fernet_key)
+            self.cipher_suite = Fernet(self.fernet_key)
+
+        # キー情報は不変なので、フィンガープリント込みでここで一度だけ
+        # 組み立てる。従来は呼び出しごとにハッシュ計算していた上、
+        # 空入力をハッシュしておりキーを反映していなかった
+        fingerprint = hashlib.sha256(self.fernet_key).digest()[:8]
+        self._key_info = {
+            "key_algorithm": "AES-256",
+            "key_derivation": "scrypt" if self.master_key else "random",
+            "kdf_params": "n=32768,r=8,p=1" if self.master_key else "",
+            "has_master_key": bool(self.master_key),
+            "key_fingerprint": base64.urlsafe_b64encode(fingerprint).decode('utf-8')
+        }
     
     def _derive_key_from_master(self, master_key: str, salt: Optional[bytes] = None) -> bytes:
-        """マスターキーから暗号化キーを導出"""
-        
+        """マスターキーから暗号化キーを導出 (scrypt)
+
+        scrypt はメモリハードなため、PBKDF2 と違い GPU での総当たりにも
+        メモリ帯域のコストを強制できる
+        """
+
         if salt is None:
             # デフォルトのソルト（実運用では動的生成を推奨）
             salt = b'personal_ai_agent_salt_2024'
-        
+
+        kdf = Scrypt(
+            salt=salt,
+            length=32,
+            n=2**15,
+            r=8,
+            p=1,
+            backend=default_backend()
+        )
+
+        key = base64.urlsafe_b64encode(kdf.derive(master_key.encode()))
+        return key
+
+    def _derive_legacy_key(self, master_key: str, salt: Optional[bytes] = None) -> bytes:
+        """旧 PBKDF2 方式の導出キー (既存データの復号専用)"""
+
+        if salt is None:
+            salt = b'personal_ai_agent_salt_2024'
+
         kdf = PBKDF2HMAC(
             algorithm=hashes.SHA256(),
             length=32,
@@ -60,29 +124,37 @@ class EncryptionManager:
             iterations=100000,
             backend=default_backend()
         )
-        
+
         key = base64.urlsafe_b64encode(kdf.derive(master_key.encode()))
         return key
     
     def encrypt_string(self, plaintext: str) -> str:
-        """文字列を暗号化"""
-        
+        """文字列を暗号化
+
+        Fernet トークンは元々 URL-safe base64 なので追加エンコードしない
+        """
+
         try:
-            encrypted_data = self.cipher_suite.encrypt(plaintext.encode('utf-8'))
-            return base64.urlsafe_b64encode(encrypted_data).decode('utf-8')
-            
+            return self.cipher_suite.encrypt(plaintext.encode('utf-8')).decode('ascii')
+
         except Exception as e:
             logger.error(f"Failed to encrypt string: {e}")
             raise
-    
+
     def decrypt_string(self, ciphertext: str) -> str:
         """暗号化された文字列を復号化"""
-        
+
         try:
-            encrypted_data = base64.urlsafe_b64decode(ciphertext.encode('utf-8'))
-            decrypted_data = self.cipher_suite.decrypt(encrypted_data)
+            token = ciphertext.encode('ascii')
+
+            # 旧形式は Fernet トークンをさらに base64 した二重エンコード。
+            # Fernet トークンは 'gAAAA' 始まり、その base64 は 'Z0' 始まり
+            if token.startswith(b'Z0'):
+                token = base64.urlsafe_b64decode(token)
+
+            decrypted_data = self.cipher_suite.decrypt(token)
             return decrypted_data.decode('utf-8')
-            
+
         except Exception as e:
             logger.error(f"Failed to decrypt string: {e}")
             raise
@@ -91,8 +163,7 @@ class EncryptionManager:
         """辞書データを暗号化"""
         
         try:
-            import json
-            json_string = json.dumps(data, ensure_ascii=False)
+            json_string = _json_dumps(data)
             return self.encrypt_string(json_string)
             
         except Exception as e:
@@ -103,112 +174,207 @@ class EncryptionManager:
         """暗号化された辞書データを復号化"""
         
         try:
-            import json
             json_string = self.decrypt_string(ciphertext)
-            return json.loads(json_string)
+            return _json_loads(json_string)
             
         except Exception as e:
             logger.error(f"Failed to decrypt dict: {e}")
             raise
     
+    # ストリーミングファイル暗号化のフォーマット定数
+    _FILE_MAGIC = b'PAIA'
+    _FILE_IV_SIZE = 12
+    _FILE_TAG_SIZE = 16
+    _FILE_CHUNK_SIZE = 1024 * 1024
+
+    def _file_encryption_key(self) -> bytes:
+        """ファイル暗号化用の AES-256 キーを Fernet キーから導出"""
+
+        return hashlib.sha256(b'file-encryption:' + self.fernet_key).digest()
+
     def encrypt_file(self, input_file_path: str, output_file_path: str) -> bool:
-        """ファイルを暗号化"""
-        
+        """ファイルを暗号化
+
+        AES-256-GCM で 1MB ずつストリーム処理するため、ピークメモリは
+        ファイルサイズによらず一定。出力はマジック + IV + 暗号文 + タグ
+        """
+
         try:
-            with open(input_file_path, 'rb') as infile:
-                file_data = infile.read()
-            
-            encrypted_data = self.cipher_suite.encrypt(file_data)
-            
-            with open(output_file_path, 'wb') as outfile:
-                outfile.write(encrypted_data)
-            
+            iv = os.urandom(self._FILE_IV_SIZE)
+            encryptor = Cipher(
+                algorithms.AES(self._file_encryption_key()),
+                modes.GCM(iv),
+                backend=default_backend()
+            ).encryptor()
+
+            with open(input_file_path, 'rb') as infile, \
+                 open(output_file_path, 'wb') as outfile:
+                outfile.write(self._FILE_MAGIC)
+                outfile.write(iv)
+
+                while chunk := infile.read(self._FILE_CHUNK_SIZE):
+                    outfile.write(encryptor.update(chunk))
+
+                encryptor.finalize()
+                outfile.write(encryptor.tag)
+
             logger.info(f"File encrypted: {input_file_path} -> {output_file_path}")
             return True
-            
+
         except Exception as e:
             logger.error(f"Failed to encrypt file: {e}")
             return False
-    
+
     def decrypt_file(self, input_file_path: str, output_file_path: str) -> bool:
-        """暗号化されたファイルを復号化"""
-        
+        """暗号化されたファイルを復号化
+
+        新形式はストリーム復号。マジックのない旧形式 (Fernet 一括) は
+        従来どおり全読みで復号する
+        """
+
         try:
             with open(input_file_path, 'rb') as infile:
-                encrypted_data = infile.read()
-            
-            decrypted_data = self.cipher_suite.decrypt(encrypted_data)
-            
-            with open(output_file_path, 'wb') as outfile:
-                outfile.write(decrypted_data)
-            
+                magic = infile.read(len(self._FILE_MAGIC))
+
+                if magic != self._FILE_MAGIC:
+                    # 旧形式フォールバック
+                    infile.seek(0)
+                    decrypted_data = self.cipher_suite.decrypt(infile.read())
+                    with open(output_file_path, 'wb') as outfile:
+                        outfile.write(decrypted_data)
+                    logger.info(f"File decrypted: {input_file_path} -> {output_file_path}")
+                    return True
+
+                iv = infile.read(self._FILE_IV_SIZE)
+                header_size = len(self._FILE_MAGIC) + self._FILE_IV_SIZE
+                body_size = os.fstat(infile.fileno()).st_size - header_size - self._FILE_TAG_SIZE
+
+                infile.seek(-self._FILE_TAG_SIZE, os.SEEK_END)
+                tag = infile.read(self._FILE_TAG_SIZE)
+                infile.seek(header_size)
+
+                decryptor = Cipher(
+                    algorithms.AES(self._file_encryption_key()),
+                    modes.GCM(iv, tag),
+                    backend=default_backend()
+                ).decryptor()
+
+                with open(output_file_path, 'wb') as outfile:
+                    remaining = body_size
+                    while remaining > 0:
+                        chunk = infile.read(min(self._FILE_CHUNK_SIZE, remaining))
+                        if not chunk:
+                            break
+                        remaining -= len(chunk)
+                        outfile.write(decryptor.update(chunk))
+
+                    # GCM タグ検証; 改竄されていれば例外で False になる
+                    decryptor.finalize()
+
             logger.info(f"File decrypted: {input_file_path} -> {output_file_path}")
             return True
-            
+
         except Exception as e:
             logger.error(f"Failed to decrypt file: {e}")
             return False
     
+    def encrypt_bytes(self, data: bytes) -> bytes:
+        """バイト列を AES-256-GCM で暗号化
+
+        base64 を一切介さないため、Fernet 経由より ~33% 小さい。
+        フォーマットはファイル暗号化と同じ: マジック + IV + 暗号文 + タグ
+        """
+
+        iv = os.urandom(self._FILE_IV_SIZE)
+        encryptor = Cipher(
+            algorithms.AES(self._file_encryption_key()),
+            modes.GCM(iv),
+            backend=default_backend()
+        ).encryptor()
+
+        ciphertext = encryptor.update(data)
+        encryptor.finalize()
+        return self._FILE_MAGIC + iv + ciphertext + encryptor.tag
+
+    def decrypt_bytes(self, blob: bytes) -> bytes:
+        """encrypt_bytes で暗号化されたバイト列を復号化"""
+
+        if not blob.startswith(self._FILE_MAGIC):
+            raise ValueError("Unknown encrypted data format")
+
+        header_size = len(self._FILE_MAGIC) + self._FILE_IV_SIZE
+        iv = blob[len(self._FILE_MAGIC):header_size]
+        tag = blob[-self._FILE_TAG_SIZE:]
+
+        decryptor = Cipher(
+            algorithms.AES(self._file_encryption_key()),
+            modes.GCM(iv, tag),
+            backend=default_backend()
+        ).decryptor()
+
+        plaintext = decryptor.update(blob[header_size:-self._FILE_TAG_SIZE])
+        decryptor.finalize()
+        return plaintext
+
     def generate_secure_token(self, length: int = 32) -> str:
         """セキュアなトークンを生成"""
         
         return secrets.token_urlsafe(length)
     
-    def hash_password(self, password: str, salt: Optional[bytes] = None) -> tuple[str, str]:
-        """パスワードをハッシュ化"""
-        
-        if salt is None:
-            salt = os.urandom(32)
-        
+    def hash_password(self, password: str) -> str:
+        """パスワードをハッシュ化 (bcrypt)"""
+
+        return _password_context.hash(password)
+
+    def verify_password(self, password: str, hashed_password: str, salt: Optional[str] = None) -> bool:
+        """パスワードを検証
+
+        salt が渡された場合は旧 PBKDF2 形式として検証する
+        (既存ユーザーの移行用; 成功時の再ハッシュは呼び出し側で行う)
+        """
+
+        try:
+            if salt is not None:
+                return self._verify_legacy_password(password, hashed_password, salt)
+
+            return _password_context.verify(password, hashed_password)
+
+        except Exception:
+            return False
+
+    def password_needs_rehash(self, hashed_password: str) -> bool:
+        """ハッシュが現行方式・パラメータより古いかを判定"""
+
+        try:
+            return _password_context.needs_update(hashed_password)
+        except Exception:
+            return True
+
+    def _verify_legacy_password(self, password: str, hashed_password: str, salt: str) -> bool:
+        """旧 PBKDF2-SHA256 形式のパスワード検証
+
+        比較は必ず hmac.compare_digest で行うこと。`==` に書き換えると
+        前方一致の所要時間差からハッシュが推測可能になる
+        """
+
+        salt_bytes = base64.urlsafe_b64decode(salt.encode('utf-8'))
+        expected_hash = base64.urlsafe_b64decode(hashed_password.encode('utf-8'))
+
         kdf = PBKDF2HMAC(
             algorithm=hashes.SHA256(),
             length=32,
-            salt=salt,
+            salt=salt_bytes,
             iterations=100000,
             backend=default_backend()
         )
-        
-        hashed_password = kdf.derive(password.encode())
-        
-        return (
-            base64.urlsafe_b64encode(hashed_password).decode('utf-8'),
-            base64.urlsafe_b64encode(salt).decode('utf-8')
-        )
-    
-    def verify_password(self, password: str, hashed_password: str, salt: str) -> bool:
-        """パスワードを検証"""
-        
-        try:
-            salt_bytes = base64.urlsafe_b64decode(salt.encode('utf-8'))
-            expected_hash = base64.urlsafe_b64decode(hashed_password.encode('utf-8'))
-            
-            kdf = PBKDF2HMAC(
-                algorithm=hashes.SHA256(),
-                length=32,
-                salt=salt_bytes,
-                iterations=100000,
-                backend=default_backend()
-            )
-            
-            kdf.verify(password.encode(), expected_hash)
-            return True
-            
-        except Exception:
-            return False
+
+        computed_hash = kdf.derive(password.encode())
+        return hmac.compare_digest(expected_hash, computed_hash)
     
     def get_key_info(self) -> Dict[str, str]:
         """暗号化キーの情報を取得"""
-        
-        return {
-            "key_algorithm": "AES-256",
-            "key_derivation": "PBKDF2-SHA256",
-            "iterations": "100000",
-            "has_master_key": bool(self.master_key),
-            "key_fingerprint": base64.urlsafe_b64encode(
-                hashes.Hash(hashes.SHA256(), backend=default_backend())
-                .finalize()[:8]
-            ).decode('utf-8')
-        }
+
+        return dict(self._key_info)
 
 class SecureStorage:
     """
@@ -230,16 +396,17 @@ class SecureStorage:
         """データを暗号化して保存"""
         
         try:
-            # データを JSON シリアライズして暗号化
-            import json
-            json_data = json.dumps(data, ensure_ascii=False, default=str)
-            encrypted_data = self.encryption_manager.encrypt_string(json_data)
-            
-            # ファイルに保存
+            # シリアライズ結果をバイナリのまま暗号化して保存。
+            # テキスト化 (base64) を挟まないぶん小さく速い
+            json_data = _json_dumps(data, default=str)
+            encrypted_blob = self.encryption_manager.encrypt_bytes(
+                json_data.encode('utf-8')
+            )
+
             file_path = os.path.join(self.storage_path, f"{key}.enc")
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(encrypted_data)
-            
+            with open(file_path, 'wb') as f:
+                f.write(encrypted_blob)
+
             logger.debug(f"Secure data stored: {key}")
             return True
             
@@ -255,15 +422,19 @@ class SecureStorage:
             
             if not os.path.exists(file_path):
                 return None
-            
-            with open(file_path, 'r', encoding='utf-8') as f:
-                encrypted_data = f.read()
-            
-            # 復号化してデシリアライズ
-            decrypted_data = self.encryption_manager.decrypt_string(encrypted_data)
-            
-            import json
-            return json.loads(decrypted_data)
+
+            with open(file_path, 'rb') as f:
+                encrypted_blob = f.read()
+
+            # 復号化してデシリアライズ (マジックのない旧テキスト形式にも対応)
+            if encrypted_blob.startswith(EncryptionManager._FILE_MAGIC):
+                decrypted_data = self.encryption_manager.decrypt_bytes(encrypted_blob)
+            else:
+                decrypted_data = self.encryption_manager.decrypt_string(
+                    encrypted_blob.decode('utf-8')
+                )
+
+            return _json_loads(decrypted_data)
             
         except Exception as e:
             logger.error(f"Failed to load secure data {key}: {e}")
@@ -316,30 +487,37 @@ class DataProtectionManager:
             'credit_card': r'\b\d{4}[-\s]?\d{4}[-\s]?\d{4}[-\s]?\d{4}\b',
             'japanese_name': r'[一-龯][一-龯\s]{1,10}[一-龯]',
         }
-        
+
+        # コンパイルは初期化時に一度だけ。検出用には全パターンを
+        # 名前付きグループで結合し、テキストを一回の走査で分類する
+        self._compiled_patterns = {
+            pii_type: re.compile(pattern)
+            for pii_type, pattern in self.pii_patterns.items()
+        }
+        self._union_pattern = re.compile("|".join(
+            f"(?P<{pii_type}>{pattern})"
+            for pii_type, pattern in self.pii_patterns.items()
+        ))
+        self._digit_pattern = re.compile(r'\d')
+
         logger.info("DataProtectionManager initialized")
-    
+
     def detect_pii(self, text: str) -> Dict[str, list]:
         """個人情報を検出"""
-        
-        import re
+
         detected = {}
-        
-        for pii_type, pattern in self.pii_patterns.items():
-            matches = re.findall(pattern, text)
-            if matches:
-                detected[pii_type] = matches
-        
+
+        for match in self._union_pattern.finditer(text):
+            detected.setdefault(match.lastgroup, []).append(match.group(0))
+
         return detected
-    
+
     def mask_pii(self, text: str, mask_char: str = '*') -> str:
         """個人情報をマスク"""
-        
-        import re
-        
+
         masked_text = text
-        
-        for pii_type, pattern in self.pii_patterns.items():
+
+        for pii_type, pattern in self._compiled_patterns.items():
             def mask_match(match):
                 matched_text = match.group(0)
                 if pii_type == 'email':
@@ -349,7 +527,7 @@ class DataProtectionManager:
                     return f"{masked_local}@{domain}"
                 elif pii_type == 'phone':
                     # 電話番号の中央部をマスク
-                    return re.sub(r'\d', mask_char, matched_text[:-4]) + matched_text[-4:]
+                    return self._digit_pattern.sub(mask_char, matched_text[:-4]) + matched_text[-4:]
                 elif pii_type == 'credit_card':
                     # クレジットカード番号の中央部をマスク
                     return matched_text[:4] + mask_char * (len(matched_text) - 8) + matched_text[-4:]
@@ -359,28 +537,72 @@ class DataProtectionManager:
                         return matched_text[0] + mask_char * (len(matched_text) - 2) + matched_text[-1]
                     else:
                         return mask_char * len(matched_text)
-            
-            masked_text = re.sub(pattern, mask_match, masked_text)
-        
+
+            masked_text = pattern.sub(mask_match, masked_text)
+
         return masked_text
     
+    # 文字列リーフの結合に使う番兵。PII パターンはいずれも制御文字に
+    # マッチしないため、結合してもマッチ境界は変わらない
+    _SANITIZE_SENTINEL = '\x00\x1f\x00'
+
     def sanitize_for_logging(self, data: Union[str, Dict[str, Any]]) -> Union[str, Dict[str, Any]]:
-        """ログ出力用にデータをサニタイズ"""
-        
+        """ログ出力用にデータをサニタイズ
+
+        辞書の文字列リーフをまとめて一回のマスク処理に掛けるため、
+        正規表現の起動回数はフィールド数によらず一定
+        """
+
         if isinstance(data, str):
             return self.mask_pii(data)
         elif isinstance(data, dict):
-            sanitized = {}
-            for key, value in data.items():
-                if isinstance(value, str):
-                    sanitized[key] = self.mask_pii(value)
-                elif isinstance(value, dict):
-                    sanitized[key] = self.sanitize_for_logging(value)
-                else:
-                    sanitized[key] = value
-            return sanitized
+            values: list = []
+            self._collect_string_leaves(data, values)
+
+            if not values or any(self._SANITIZE_SENTINEL in value for value in values):
+                # 番兵が本文に現れる場合のみ従来の値ごとマスクに退避
+                return self._sanitize_per_value(data)
+
+            masked = iter(self.mask_pii(self._SANITIZE_SENTINEL.join(values))
+                          .split(self._SANITIZE_SENTINEL))
+            return self._rebuild_with_masked(data, masked)
         else:
             return data
+
+    def _collect_string_leaves(self, node: Dict[str, Any], out: list) -> None:
+        """辞書を辿って文字列リーフを順番に集める"""
+
+        for value in node.values():
+            if isinstance(value, str):
+                out.append(value)
+            elif isinstance(value, dict):
+                self._collect_string_leaves(value, out)
+
+    def _rebuild_with_masked(self, node: Dict[str, Any], masked) -> Dict[str, Any]:
+        """_collect_string_leaves と同じ順序でマスク済み文字列を書き戻す"""
+
+        rebuilt = {}
+        for key, value in node.items():
+            if isinstance(value, str):
+                rebuilt[key] = next(masked)
+            elif isinstance(value, dict):
+                rebuilt[key] = self._rebuild_with_masked(value, masked)
+            else:
+                rebuilt[key] = value
+        return rebuilt
+
+    def _sanitize_per_value(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """値ごとにマスクするフォールバック"""
+
+        sanitized = {}
+        for key, value in data.items():
+            if isinstance(value, str):
+                sanitized[key] = self.mask_pii(value)
+            elif isinstance(value, dict):
+                sanitized[key] = self._sanitize_per_value(value)
+            else:
+                sanitized[key] = value
+        return sanitized
     
     def is_sensitive_field(self, field_name: str) -> bool:
         """フィールド名から機密情報かどうかを判定"""
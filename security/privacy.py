@@ -3,16 +3,59 @@
 Personal AI Agent - プライバシー保護システム
 """
 
+import copy
 import logging
 import hashlib
+import time
+from collections import Counter, defaultdict
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Set
+from typing import Dict, List, Optional, Any, Set, Tuple
 from dataclasses import dataclass
 from enum import Enum
+from functools import lru_cache
+from uuid import uuid4
 import re
 
+import numpy as np
+
+try:
+    import orjson
+
+    def _json_dumps_bytes(data: Any, default=None) -> bytes:
+        return orjson.dumps(data, default=default)
+except ImportError:
+    import json
+
+    def _json_dumps_bytes(data: Any, default=None) -> bytes:
+        return json.dumps(data, ensure_ascii=False, default=default).encode('utf-8')
+
 logger = logging.getLogger(__name__)
 
+
+def _iso_default(obj: Any) -> str:
+    """json フォールバック用: datetime を ISO 形式へ (orjson はネイティブ処理)"""
+
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _hash_string(text: str) -> str:
+    """文字列のハッシュ化 (16桁hex)
+
+    BLAKE2b の digest_size=8 で切り詰めなしに 16 文字を得る。
+    短い入力では SHA-256 より軽い
+    """
+
+    return hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
+
+
+@lru_cache(maxsize=4096)
+def _pseudonymize(user_id: str, salt: str) -> str:
+    """ユーザーIDの仮名化 (同一IDの再計算をキャッシュ)"""
+
+    return _hash_string(f"{user_id}{salt}")
+
 class DataType(Enum):
     """データタイプ分類"""
     PERSONAL_INFO = "personal_info"
@@ -38,7 +81,7 @@ class ConsentStatus(Enum):
     PENDING = "pending"
     WITHDRAWN = "withdrawn"
 
-@dataclass
+@dataclass(slots=True)
 class DataProcessingRecord:
     """データ処理記録"""
     record_id: str
@@ -51,8 +94,10 @@ class DataProcessingRecord:
     anonymized: bool
     encrypted: bool
     metadata: Dict[str, Any]
+    # retention_period は生成後不変なので、期限は挿入時に一度だけ計算する
+    expiry_date: datetime
 
-@dataclass
+@dataclass(slots=True)
 class ConsentRecord:
     """同意記録"""
     consent_id: str
@@ -71,10 +116,38 @@ class PrivacyManager:
     
     GDPR準拠のデータ保護とプライバシー管理機能を提供
     """
-    
+
+    # 法的要件により削除できない処理目的
+    _LEGAL_RETENTION_PURPOSES = frozenset({
+        ProcessingPurpose.COMPLIANCE,
+        ProcessingPurpose.SECURITY
+    })
+
     def __init__(self):
         self.processing_records: List[DataProcessingRecord] = []
         self.consent_records: Dict[str, ConsentRecord] = {}
+        # (user_id, data_type, purpose) から同意記録への逆引き。
+        # check_user_consent を全件走査なしの一回のハッシュ参照にする
+        self._consent_index: Dict[
+            Tuple[str, DataType, ProcessingPurpose], ConsentRecord
+        ] = {}
+        # user_id ごとの処理記録バケット。エクスポート・削除・同意撤回を
+        # 全記録走査ではなく該当ユーザーの記録数に比例する処理にする
+        self._records_by_user: Dict[str, List[DataProcessingRecord]] = defaultdict(list)
+        # 処理記録のホット列 (処理日時・保持期間・暗号化フラグ) を
+        # processing_records と並行する NumPy 配列で持つ (SoA)。
+        # 期限切れ判定がレコード毎の datetime 演算ではなく
+        # ベクトル化された int64 比較一回になる
+        self._proc_count = 0
+        self._proc_expiry = np.empty(1024, dtype=np.int64)
+        self._proc_encrypted = np.empty(1024, dtype=bool)
+        # 監査レポートのキャッシュ。データ変更ごとに世代カウンタを進め、
+        # 変更がない間の繰り返し監査は再走査せずに返す
+        self._mutation_counter = 0
+        self._audit_cache: Optional[Dict[str, Any]] = None
+        self._audit_cache_token = -1
+        self._audit_cache_expires = 0.0
+        self._audit_cache_ttl = 60.0
         self.data_retention_policies: Dict[DataType, timedelta] = {}
         self.anonymization_rules: Dict[DataType, List[str]] = {}
         
@@ -103,6 +176,14 @@ class PrivacyManager:
             DataType.TASK_DATA: ["personal_details", "location"],
             DataType.ANALYTICS: ["user_id", "ip_address", "device_id"]
         }
+
+        # 匿名化ルールをデータタイプごとに一度だけ frozenset 化しておく。
+        # anonymize_data ではキー集合との積集合 (C実装) 一回で対象
+        # フィールドが決まり、ルール数に比例したループが不要になる
+        self._anon_rule_sets: Dict[DataType, frozenset] = {
+            data_type: frozenset(fields)
+            for data_type, fields in self.anonymization_rules.items()
+        }
     
     def record_data_processing(self, 
                              data_type: DataType,
@@ -112,19 +193,22 @@ class PrivacyManager:
                              anonymized: bool = False,
                              encrypted: bool = True) -> str:
         """データ処理の記録"""
-        
-        import uuid
-        record_id = str(uuid.uuid4())
+
+        record_id = uuid4().hex
         
         # ユーザー同意の確認
         consent_status = self.check_user_consent(user_id, data_type, purpose)
         
+        processing_date = datetime.now()
+        retention_period = self.data_retention_policies.get(data_type, timedelta(days=365))
+
         record = DataProcessingRecord(
             record_id=record_id,
             data_type=data_type,
             purpose=purpose,
-            processing_date=datetime.now(),
-            retention_period=self.data_retention_policies.get(data_type, timedelta(days=365)),
+            processing_date=processing_date,
+            retention_period=retention_period,
+            expiry_date=processing_date + retention_period,
             legal_basis=legal_basis,
             user_consent=consent_status,
             anonymized=anonymized,
@@ -136,7 +220,10 @@ class PrivacyManager:
         )
         
         self.processing_records.append(record)
-        
+        self._records_by_user[user_id].append(record)
+        self._append_proc_columns(record)
+        self._mutation_counter += 1
+
         logger.info(f"Data processing recorded: {record_id}")
         return record_id
     
@@ -147,9 +234,8 @@ class PrivacyManager:
                            consent_text: str,
                            version: str = "1.0") -> str:
         """ユーザー同意の要求"""
-        
-        import uuid
-        consent_id = str(uuid.uuid4())
+
+        consent_id = uuid4().hex
         
         consent_record = ConsentRecord(
             consent_id=consent_id,
@@ -164,7 +250,9 @@ class PrivacyManager:
         )
         
         self.consent_records[consent_id] = consent_record
-        
+        self._consent_index[(user_id, data_type, purpose)] = consent_record
+        self._mutation_counter += 1
+
         logger.info(f"Consent requested: {consent_id}")
         return consent_id
     
@@ -177,7 +265,8 @@ class PrivacyManager:
         consent = self.consent_records[consent_id]
         consent.status = ConsentStatus.GRANTED
         consent.granted_date = datetime.now()
-        
+        self._mutation_counter += 1
+
         logger.info(f"Consent granted: {consent_id}")
         return True
     
@@ -193,7 +282,8 @@ class PrivacyManager:
         
         # 関連データの処理停止
         self._handle_consent_withdrawal(consent)
-        
+        self._mutation_counter += 1
+
         logger.info(f"Consent withdrawn: {consent_id}")
         return True
     
@@ -202,86 +292,119 @@ class PrivacyManager:
                           data_type: DataType,
                           purpose: ProcessingPurpose) -> ConsentStatus:
         """ユーザー同意状況の確認"""
-        
-        for consent in self.consent_records.values():
-            if (consent.user_id == user_id and 
-                consent.data_type == data_type and 
-                consent.purpose == purpose):
-                return consent.status
-        
+
+        consent = self._consent_index.get((user_id, data_type, purpose))
+        if consent is not None:
+            return consent.status
+
         return ConsentStatus.PENDING
     
     def anonymize_data(self, data: Dict[str, Any], data_type: DataType) -> Dict[str, Any]:
         """データの匿名化"""
         
-        rules = self.anonymization_rules.get(data_type, [])
-        anonymized_data = data.copy()
-        
-        for field in rules:
-            if field in anonymized_data:
-                # フィールドをハッシュ化または削除
-                if isinstance(anonymized_data[field], str):
-                    anonymized_data[field] = self._hash_string(anonymized_data[field])
-                else:
-                    anonymized_data[field] = "[ANONYMIZED]"
+        rules = self._anon_rule_sets.get(data_type)
+        overlap = data.keys() & rules if rules else ()
+
+        if not overlap:
+            # 匿名化対象フィールドがなければコピーせずそのまま返す
+            logger.debug(f"Data anonymized for type: {data_type}")
+            return data
+
+        anonymized_data = {**data}
+        for field in overlap:
+            # フィールドをハッシュ化または削除
+            value = anonymized_data[field]
+            if isinstance(value, str):
+                anonymized_data[field] = _hash_string(value)
+            else:
+                anonymized_data[field] = "[ANONYMIZED]"
         
         logger.debug(f"Data anonymized for type: {data_type}")
         return anonymized_data
     
     def pseudonymize_user_id(self, user_id: str, salt: str = "privacy_salt") -> str:
         """ユーザーIDの仮名化"""
-        
-        return self._hash_string(f"{user_id}{salt}")
+
+        return _pseudonymize(user_id, salt)
     
-    def generate_data_export(self, user_id: str) -> Dict[str, Any]:
-        """ユーザーデータのエクスポート（GDPR Article 20対応）"""
-        
-        export_data = {
-            "user_id": user_id,
-            "export_date": datetime.now().isoformat(),
-            "data_categories": {},
-            "processing_records": [],
-            "consent_records": []
-        }
-        
-        # 処理記録の収集
-        user_processing_records = [
-            record for record in self.processing_records
-            if record.metadata.get("user_id") == user_id
-        ]
-        
-        export_data["processing_records"] = [
-            {
+    def _iter_processing_entries(self, user_id: str, iso: bool = True):
+        """該当ユーザーの処理記録をエクスポート形式の dict で逐次生成
+
+        iso=False では datetime をそのまま残し、シリアライザ側
+        (orjson の C 実装) に変換を任せる
+        """
+
+        for record in self._records_by_user.get(user_id, ()):
+            yield {
                 "record_id": record.record_id,
                 "data_type": record.data_type.value,
                 "purpose": record.purpose.value,
-                "processing_date": record.processing_date.isoformat(),
+                "processing_date": record.processing_date.isoformat() if iso else record.processing_date,
                 "retention_period_days": record.retention_period.days,
                 "legal_basis": record.legal_basis
             }
-            for record in user_processing_records
-        ]
-        
-        # 同意記録の収集
-        user_consent_records = [
-            consent for consent in self.consent_records.values()
-            if consent.user_id == user_id
-        ]
-        
-        export_data["consent_records"] = [
-            {
+
+    def _iter_consent_entries(self, user_id: str, iso: bool = True):
+        """該当ユーザーの同意記録をエクスポート形式の dict で逐次生成"""
+
+        for consent in self.consent_records.values():
+            if consent.user_id != user_id:
+                continue
+            granted = consent.granted_date
+            yield {
                 "consent_id": consent.consent_id,
                 "data_type": consent.data_type.value,
                 "purpose": consent.purpose.value,
                 "status": consent.status.value,
-                "granted_date": consent.granted_date.isoformat() if consent.granted_date else None,
+                "granted_date": granted.isoformat() if (iso and granted) else granted,
                 "version": consent.version
             }
-            for consent in user_consent_records
-        ]
-        
+
+    def generate_data_export(self, user_id: str) -> Dict[str, Any]:
+        """ユーザーデータのエクスポート（GDPR Article 20対応）"""
+
+        export_data = {
+            "user_id": user_id,
+            "export_date": datetime.now().isoformat(),
+            "data_categories": {},
+            "processing_records": list(self._iter_processing_entries(user_id)),
+            "consent_records": list(self._iter_consent_entries(user_id))
+        }
+
         logger.info(f"Data export generated for user: {user_id}")
         return export_data
+
+    def generate_data_export_stream(self, user_id: str, file_path: str) -> bool:
+        """ユーザーデータを NDJSON でファイルに直接書き出す
+
+        記録数が多いユーザーでも全件をリストに積まず 1 レコード
+        1 行ずつシリアライズするため、メモリ使用量が一定で済む
+        """
+
+        try:
+            with open(file_path, 'wb') as f:
+                f.write(_json_dumps_bytes({
+                    "user_id": user_id,
+                    "export_date": datetime.now()
+                }, default=_iso_default))
+                f.write(b"\n")
+
+                for entry in self._iter_processing_entries(user_id, iso=False):
+                    entry["kind"] = "processing_record"
+                    f.write(_json_dumps_bytes(entry, default=_iso_default))
+                    f.write(b"\n")
+
+                for entry in self._iter_consent_entries(user_id, iso=False):
+                    entry["kind"] = "consent_record"
+                    f.write(_json_dumps_bytes(entry, default=_iso_default))
+                    f.write(b"\n")
+
+            logger.info(f"Data export streamed for user: {user_id}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to stream data export: {e}")
+            return False
     
     def delete_user_data(self, user_id: str, data_types: Optional[List[DataType]] = None) -> Dict[str, Any]:
         """ユーザーデータの削除（GDPR Article 17対応）"""
@@ -293,26 +416,44 @@ class PrivacyManager:
             "anonymized_records": [],
             "retained_records": []
         }
-        
+
+        # 記録のないユーザーは走査せず即返す (バケット dict が
+        # 既知ユーザー集合を兼ねるので Bloom フィルタは不要)
+        if user_id not in self._records_by_user:
+            logger.info(f"User data deletion completed for: {user_id}")
+            return deletion_summary
+
         target_types = data_types or list(DataType)
-        
-        # 処理記録の削除・匿名化
-        remaining_records = []
-        for record in self.processing_records:
-            if record.metadata.get("user_id") == user_id and record.data_type in target_types:
+
+        # 該当ユーザーのバケットだけを見て削除・匿名化を決定
+        deleted_ids = set()
+        user_remaining = []
+        for record in self._records_by_user.get(user_id, ()):
+            if record.data_type in target_types:
                 if self._can_delete_record(record):
+                    deleted_ids.add(record.record_id)
                     deletion_summary["deleted_records"].append(record.record_id)
                 else:
                     # 法的要件により保持が必要な場合は匿名化
                     record.anonymized = True
                     record.metadata["user_id"] = self.pseudonymize_user_id(user_id)
                     deletion_summary["anonymized_records"].append(record.record_id)
-                    remaining_records.append(record)
+                    self._records_by_user[record.metadata["user_id"]].append(record)
             else:
-                remaining_records.append(record)
-        
-        self.processing_records = remaining_records
-        
+                user_remaining.append(record)
+
+        if deleted_ids:
+            self.processing_records = [
+                record for record in self.processing_records
+                if record.record_id not in deleted_ids
+            ]
+            self._rebuild_proc_columns()
+        if user_remaining:
+            self._records_by_user[user_id] = user_remaining
+        else:
+            self._records_by_user.pop(user_id, None)
+        self._mutation_counter += 1
+
         logger.info(f"User data deletion completed for: {user_id}")
         return deletion_summary
     
@@ -321,106 +462,146 @@ class PrivacyManager:
         
         now = datetime.now()
         cleanup_summary = {"deleted_records": 0, "anonymized_records": 0}
-        
-        remaining_records = []
-        
-        for record in self.processing_records:
-            expiry_date = record.processing_date + record.retention_period
-            
-            if expiry_date < now:
-                if self._can_delete_record(record):
-                    cleanup_summary["deleted_records"] += 1
-                else:
-                    # 匿名化して保持
-                    record.anonymized = True
-                    if "user_id" in record.metadata:
-                        record.metadata["user_id"] = self.pseudonymize_user_id(
-                            record.metadata["user_id"]
-                        )
-                    cleanup_summary["anonymized_records"] += 1
-                    remaining_records.append(record)
+
+        expired = self._expired_mask(now)
+        expired_indices = np.flatnonzero(expired)
+
+        if expired_indices.size == 0:
+            # 期限切れなし: Python ループを一切回さず終了
+            logger.info(f"Data cleanup completed: {cleanup_summary}")
+            return cleanup_summary
+
+        keep = ~expired
+        for i in expired_indices.tolist():
+            record = self.processing_records[i]
+            if self._can_delete_record(record):
+                cleanup_summary["deleted_records"] += 1
             else:
-                remaining_records.append(record)
-        
-        self.processing_records = remaining_records
-        
+                # 匿名化して保持
+                record.anonymized = True
+                if "user_id" in record.metadata:
+                    record.metadata["user_id"] = self.pseudonymize_user_id(
+                        record.metadata["user_id"]
+                    )
+                cleanup_summary["anonymized_records"] += 1
+                keep[i] = True
+
+        self.processing_records = [
+            record for record, kept in zip(self.processing_records, keep.tolist())
+            if kept
+        ]
+        self._rebuild_proc_columns()
+        self._rebuild_user_buckets()
+        self._mutation_counter += 1
+
         logger.info(f"Data cleanup completed: {cleanup_summary}")
         return cleanup_summary
     
     def audit_privacy_compliance(self) -> Dict[str, Any]:
         """プライバシー遵守監査"""
-        
+
+        # 変更がなく TTL 内ならキャッシュ済みレポートを返す
+        if (self._audit_cache is not None and
+                self._audit_cache_token == self._mutation_counter and
+                time.monotonic() < self._audit_cache_expires):
+            return copy.deepcopy(self._audit_cache)
+
+        now = datetime.now()
+        total = len(self.processing_records)
+
         audit_report = {
-            "audit_date": datetime.now().isoformat(),
-            "total_records": len(self.processing_records),
+            "audit_date": now.isoformat(),
+            "total_records": total,
             "consent_summary": {},
             "encryption_status": {},
             "retention_compliance": {},
             "recommendations": []
         }
         
-        # 同意状況の集計
-        consent_counts = {}
-        for consent in self.consent_records.values():
-            status = consent.status.value
-            consent_counts[status] = consent_counts.get(status, 0) + 1
-        audit_report["consent_summary"] = consent_counts
+        # 同意状況の集計 (C実装の Counter で一回の走査)
+        audit_report["consent_summary"] = dict(
+            Counter(consent.status.value for consent in self.consent_records.values())
+        )
         
-        # 暗号化状況の集計
-        encrypted_count = sum(1 for record in self.processing_records if record.encrypted)
+        # 暗号化・保持期間の集計 (SoA 列のベクトル集計、走査は計2回のみ)
+        encrypted_count = int(self._proc_encrypted[:self._proc_count].sum())
+        overdue_count = int(self._expired_mask(now).sum())
+
         audit_report["encryption_status"] = {
             "encrypted": encrypted_count,
-            "total": len(self.processing_records),
-            "percentage": (encrypted_count / len(self.processing_records) * 100) if self.processing_records else 0
+            "total": total,
+            "percentage": (encrypted_count / total * 100) if total else 0
         }
-        
-        # 保持期間遵守状況
-        now = datetime.now()
-        overdue_count = 0
-        for record in self.processing_records:
-            if record.processing_date + record.retention_period < now:
-                overdue_count += 1
-        
         audit_report["retention_compliance"] = {
             "overdue_records": overdue_count,
-            "compliance_rate": ((len(self.processing_records) - overdue_count) / len(self.processing_records) * 100) if self.processing_records else 100
+            "compliance_rate": ((total - overdue_count) / total * 100) if total else 100
         }
-        
+
         # 推奨事項
         if overdue_count > 0:
             audit_report["recommendations"].append("期限切れデータの削除が必要です")
-        
-        if encrypted_count < len(self.processing_records):
+
+        if encrypted_count < total:
             audit_report["recommendations"].append("未暗号化データの暗号化が必要です")
         
+        self._audit_cache = copy.deepcopy(audit_report)
+        self._audit_cache_token = self._mutation_counter
+        self._audit_cache_expires = time.monotonic() + self._audit_cache_ttl
+
         logger.info("Privacy compliance audit completed")
         return audit_report
     
     def _handle_consent_withdrawal(self, consent: ConsentRecord) -> None:
         """同意撤回の処理"""
-        
-        # 関連する処理記録の更新
-        for record in self.processing_records:
-            if (record.metadata.get("user_id") == consent.user_id and
-                record.data_type == consent.data_type and
+
+        # 該当ユーザーの処理記録のみ更新
+        for record in self._records_by_user.get(consent.user_id, ()):
+            if (record.data_type == consent.data_type and
                 record.purpose == consent.purpose):
                 record.user_consent = ConsentStatus.WITHDRAWN
+
+    def _append_proc_columns(self, record: DataProcessingRecord) -> None:
+        """SoA 列に記録を追記 (満杯なら容量を倍に拡張)"""
+
+        if self._proc_count == len(self._proc_expiry):
+            self._proc_expiry = np.concatenate([self._proc_expiry, np.empty_like(self._proc_expiry)])
+            self._proc_encrypted = np.concatenate([self._proc_encrypted, np.empty_like(self._proc_encrypted)])
+
+        i = self._proc_count
+        self._proc_expiry[i] = int(record.expiry_date.timestamp())
+        self._proc_encrypted[i] = record.encrypted
+        self._proc_count = i + 1
+
+    def _expired_mask(self, now: datetime) -> np.ndarray:
+        """全記録の期限切れ判定をベクトル演算一回で返す"""
+
+        return self._proc_expiry[:self._proc_count] < int(now.timestamp())
+
+    def _rebuild_proc_columns(self) -> None:
+        """processing_records の一括変更後に SoA 列を作り直す"""
+
+        self._proc_count = 0
+        for record in self.processing_records:
+            self._append_proc_columns(record)
+
+    def _rebuild_user_buckets(self) -> None:
+        """processing_records の一括変更後にユーザー別バケットを再構築"""
+
+        buckets: Dict[str, List[DataProcessingRecord]] = defaultdict(list)
+        for record in self.processing_records:
+            buckets[record.metadata.get("user_id", "")].append(record)
+        self._records_by_user = buckets
     
     def _can_delete_record(self, record: DataProcessingRecord) -> bool:
         """記録を削除可能かチェック"""
-        
+
         # 法的要件により保持が必要な場合
-        legal_retention_purposes = [
-            ProcessingPurpose.COMPLIANCE,
-            ProcessingPurpose.SECURITY
-        ]
-        
-        return record.purpose not in legal_retention_purposes
+        return record.purpose not in self._LEGAL_RETENTION_PURPOSES
     
     def _hash_string(self, text: str) -> str:
         """文字列のハッシュ化"""
-        
-        return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+        return _hash_string(text)
     
     def get_privacy_settings(self, user_id: str) -> Dict[str, Any]:
         """ユーザーのプライバシー設定取得"""
@@ -452,23 +633,49 @@ class PrivacyManager:
         try:
             # 同意設定の更新
             consents = settings.get("data_processing_consents", {})
-            
+
+            # ユーザーの同意記録を一度だけ走査してキー引きの dict を作る
+            by_key = {
+                f"{consent.data_type.value}_{consent.purpose.value}": consent
+                for consent in self.consent_records.values()
+                if consent.user_id == user_id
+            }
+
+            now = datetime.now()
+            withdrawn_keys = set()
+            changed = False
+
             for consent_key, consent_data in consents.items():
-                # 対応する同意記録を見つけて更新
-                for consent in self.consent_records.values():
-                    if (consent.user_id == user_id and
-                        f"{consent.data_type.value}_{consent.purpose.value}" == consent_key):
-                        
-                        new_status = ConsentStatus(consent_data["status"])
-                        if new_status != consent.status:
-                            if new_status == ConsentStatus.WITHDRAWN:
-                                self.withdraw_consent(consent.consent_id)
-                            elif new_status == ConsentStatus.GRANTED:
-                                self.grant_consent(consent.consent_id)
-            
+                consent = by_key.get(consent_key)
+                if consent is None:
+                    continue
+
+                new_status = ConsentStatus(consent_data["status"])
+                if new_status == consent.status:
+                    continue
+
+                if new_status == ConsentStatus.WITHDRAWN:
+                    consent.status = ConsentStatus.WITHDRAWN
+                    consent.withdrawn_date = now
+                    withdrawn_keys.add((consent.data_type, consent.purpose))
+                    changed = True
+                elif new_status == ConsentStatus.GRANTED:
+                    consent.status = ConsentStatus.GRANTED
+                    consent.granted_date = now
+                    changed = True
+
+            # 撤回分はユーザーの処理記録バケットを一回の走査でまとめて更新
+            if withdrawn_keys:
+                for record in self._records_by_user.get(user_id, ()):
+                    if (record.data_type, record.purpose) in withdrawn_keys:
+                        record.user_consent = ConsentStatus.WITHDRAWN
+
+            if changed:
+                self._mutation_counter += 1
+
             logger.info(f"Privacy settings updated for user: {user_id}")
             return True
-            
+
         except Exception as e:
             logger.error(f"Failed to update privacy settings: {e}")
             return False
\ No newline at end of file
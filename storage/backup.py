@@ -6,17 +6,288 @@ Personal AI Agent - バックアップ管理システム
 import os
 import json
 import gzip
+import hashlib
 import shutil
 import logging
+from collections import defaultdict
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, asdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import asyncio
+import io
 import subprocess
+import sys
+import tarfile
+import threading
+import time
+
+try:
+    import orjson
+
+    def _json_dumps_bytes(data: Any, indent: bool = False) -> bytes:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps_bytes(data: Any, indent: bool = False) -> bytes:
+        return json.dumps(
+            data, ensure_ascii=False, indent=2 if indent else None
+        ).encode('utf-8')
+
+    _json_loads = json.loads
 
 logger = logging.getLogger(__name__)
 
+
+def _fastcopy(src, dst) -> None:
+    """カーネル内コピーでファイルを複製する
+
+    os.copy_file_range (Linux 4.5+) → os.sendfile の順に試し、バイト列を
+    ユーザー空間に上げずにコピーする。どちらも使えない環境や途中で
+    失敗した場合は shutil.copy2 にフォールバックする
+    """
+
+    src, dst = str(src), str(dst)
+
+    try:
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+            remaining = os.fstat(src_fd).st_size
+            offset = 0
+            copy_range = getattr(os, "copy_file_range", None)
+
+            while remaining > 0:
+                if copy_range is not None:
+                    sent = copy_range(src_fd, dst_fd, remaining)
+                else:
+                    sent = os.sendfile(dst_fd, src_fd, offset, remaining)
+                    offset += sent
+                if sent == 0:
+                    break
+                remaining -= sent
+
+            if remaining > 0:
+                raise OSError("kernel copy incomplete")
+
+        shutil.copystat(src, dst)
+
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _fast_copytree(src, dst) -> None:
+    """ディレクトリツリーを高速に複製する
+
+    Linux では cp -a --reflink=auto に委譲し、reflink 対応の
+    ファイルシステム (btrfs/XFS) ならデータブロックのコピー自体を
+    省略できる。cp が使えない・失敗した場合は os.scandir で木を
+    走査し、ファイルをスレッドプールで _fastcopy 並列コピーする
+    """
+
+    src, dst = str(src), str(dst)
+
+    if sys.platform.startswith("linux"):
+        try:
+            result = subprocess.run(
+                ["cp", "-a", "--reflink=auto", src, dst],
+                capture_output=True
+            )
+            if result.returncode == 0:
+                return
+            logger.debug(f"cp --reflink=auto failed, falling back: {result.stderr!r}")
+        except OSError:
+            pass
+
+    # フォールバック: ディレクトリを走査してファイル対を集め、並列コピー
+    file_pairs = []
+    dir_pairs = []
+    queue = [(src, dst)]
+    while queue:
+        cur_src, cur_dst = queue.pop()
+        os.makedirs(cur_dst, exist_ok=True)
+        dir_pairs.append((cur_src, cur_dst))
+        with os.scandir(cur_src) as it:
+            for entry in it:
+                target = os.path.join(cur_dst, entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    queue.append((entry.path, target))
+                elif entry.is_symlink():
+                    os.symlink(os.readlink(entry.path), target)
+                else:
+                    file_pairs.append((entry.path, target))
+
+    if file_pairs:
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            list(pool.map(lambda pair: _fastcopy(*pair), file_pairs))
+
+    # ディレクトリのタイムスタンプ等は中身を入れ終えてから揃える
+    for dir_src, dir_dst in dir_pairs:
+        shutil.copystat(dir_src, dir_dst)
+
+
+class _HashingReader:
+    """読み取りと同時にチェックサムを更新するファイルラッパー"""
+
+    def __init__(self, fileobj, algorithm: str = "sha256"):
+        self._fileobj = fileobj
+        self._digest = hashlib.new(algorithm)
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._fileobj.read(size)
+        if data:
+            self._digest.update(data)
+        return data
+
+    def hexdigest(self) -> str:
+        return self._digest.hexdigest()
+
+
+def _sync_extract_verified(archive_path, extract_dir, expected_checksum: str) -> bool:
+    """アーカイブを展開しながらチェックサムを検証する
+
+    事前検証のための読み直しをせず、展開時の 1 パスでダイジェストを
+    計算する。展開後にファイル末尾まで読み切ってから照合し、
+    一致したかどうかを返す
+    """
+
+    # 旧バックアップの MD5 チェックサム (32桁hex) も検証できるようにする
+    algorithm = "md5" if len(expected_checksum) == 32 else "sha256"
+
+    with open(archive_path, "rb") as f:
+        reader = _HashingReader(f, algorithm)
+        with tarfile.open(fileobj=reader, mode="r|*") as tf:
+            tf.extractall(str(extract_dir))
+
+        # 末尾のパディングまで読み切ってダイジェストを確定させる
+        while reader.read(1024 * 1024):
+            pass
+
+    return reader.hexdigest() == expected_checksum
+
+
+class _HashingWriter:
+    """書き込みと同時に SHA-256 を更新するファイルラッパー"""
+
+    def __init__(self, fileobj):
+        self._fileobj = fileobj
+        self._digest = hashlib.sha256()
+
+    def write(self, data: bytes) -> int:
+        self._digest.update(data)
+        return self._fileobj.write(data)
+
+    def hexdigest(self) -> str:
+        return self._digest.hexdigest()
+
+
+def _sync_tar_from_sources(members, output_path, compress: bool = True) -> str:
+    """ソースから直接 tar アーカイブを書き出し、チェックサムを返す
+
+    members は (コピー元, アーカイブ内パス) のリスト。コピー元が
+    bytes の場合は合成 TarInfo でそのまま格納する。中間ステージング
+    コピーを作らないため、書き込み量がほぼ半分になる。圧縮時は
+    pigz (なければ gzip) に tar ストリームを流し込み、圧縮出力を
+    ハッシュしながらファイルへ書く
+    """
+
+    output_path = str(output_path)
+
+    def _add_members(tf: tarfile.TarFile) -> None:
+        for src, arcname in members:
+            if isinstance(src, bytes):
+                info = tarfile.TarInfo(arcname)
+                info.size = len(src)
+                info.mtime = int(time.time())
+                tf.addfile(info, io.BytesIO(src))
+            else:
+                tf.add(str(src), arcname=arcname)
+
+    try:
+        with open(output_path, "wb") as fout:
+            writer = _HashingWriter(fout)
+
+            compressor = shutil.which("pigz") or shutil.which("gzip") if compress else None
+
+            if compress and compressor is None:
+                # 外部コマンドが無い環境ではプロセス内 gzip で圧縮
+                with gzip.GzipFile(fileobj=writer, mode="wb") as gz:
+                    with tarfile.open(fileobj=gz, mode="w|",
+                                      format=tarfile.PAX_FORMAT) as tf:
+                        _add_members(tf)
+            elif compress:
+                proc = subprocess.Popen(
+                    [compressor, "-c"],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE
+                )
+
+                pump_error: List[BaseException] = []
+
+                def _pump() -> None:
+                    try:
+                        for chunk in iter(lambda: proc.stdout.read(1024 * 1024), b""):
+                            writer.write(chunk)
+                    except BaseException as e:
+                        # 書き込み失敗 (ENOSPC 等) を握り潰すと tar 側が
+                        # パイプ詰まりで永久に待つため、圧縮プロセスを
+                        # 止めて書き込みを失敗させ、例外は join 後に再送出
+                        pump_error.append(e)
+                        proc.terminate()
+
+                pump_thread = threading.Thread(target=_pump)
+                pump_thread.start()
+                tar_error = None
+                try:
+                    with tarfile.open(fileobj=proc.stdin, mode="w|",
+                                      format=tarfile.PAX_FORMAT) as tf:
+                        _add_members(tf)
+                except Exception as e:
+                    tar_error = e
+                finally:
+                    try:
+                        proc.stdin.close()
+                    except OSError:
+                        pass
+                    pump_thread.join()
+
+                if pump_error:
+                    proc.terminate()
+                    proc.wait()
+                    raise pump_error[0]
+                if tar_error is not None:
+                    proc.wait()
+                    raise tar_error
+                if proc.wait() != 0:
+                    raise RuntimeError(f"{compressor} failed with code {proc.returncode}")
+            else:
+                with tarfile.open(fileobj=writer, mode="w|",
+                                  format=tarfile.PAX_FORMAT) as tf:
+                    _add_members(tf)
+
+        return writer.hexdigest()
+
+    except Exception:
+        if os.path.exists(output_path):
+            os.unlink(output_path)
+        raise
+
+
+def _sync_calculate_checksum(file_path: str, algorithm: str = "sha256") -> str:
+    """チェックサム計算の同期実装 (ワーカープロセスで実行される)"""
+
+    with open(file_path, "rb") as f:
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, algorithm).hexdigest()
+
+        # Python 3.10 以前のフォールバック (1MiB チャンクでループ回数を抑える)
+        digest = hashlib.new(algorithm)
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+
 @dataclass
 class BackupInfo:
     """バックアップ情報"""
@@ -48,16 +319,66 @@ class BackupManager:
         # バックアップディレクトリの作成
         self.backup_dir.mkdir(parents=True, exist_ok=True)
         
-        # バックアップ履歴ファイル
-        self.history_file = self.backup_dir / "backup_history.json"
+        # バックアップ履歴ログ (追記専用 JSONL)。旧形式の JSON は読み込み時に移行
+        self.history_file = self.backup_dir / "backup_history.jsonl"
+        self.legacy_history_file = self.backup_dir / "backup_history.json"
         self.backup_history: List[BackupInfo] = []
-        
+        self._history_log_entries = 0
+
+        # バックアップ元ファイルのチェックサムキャッシュ
+        # (inode, mtime_ns, size) が一致する限り再ハッシュを省く
+        self._checksum_cache_file = self.backup_dir / ".checksum_cache.json"
+        self._checksum_cache: Dict[str, str] = {}
+        self._checksum_cache_dirty = False
+
+        # backup_id / 種別からの O(1) 引き当て用インデックス
+        self._by_id: Dict[str, BackupInfo] = {}
+        self._by_type: Dict[str, List[BackupInfo]] = defaultdict(list)
+
+        # ファイルコピー並列化用プール (初回利用時に生成)。
+        # 小さいファイルの I/O 待ちを重ね合わせてデバイスを飽和させる
+        self._copy_pool: Optional[ThreadPoolExecutor] = None
+
+        # ハッシュ・圧縮などイベントループを止める CPU 処理の逃し先
+        self._cpu_pool: Optional[ProcessPoolExecutor] = None
+
         logger.info(f"BackupManager initialized: {self.backup_dir}")
+
+    def _get_cpu_pool(self) -> ProcessPoolExecutor:
+        """CPU 処理用プロセスプールを遅延生成して返す"""
+
+        if self._cpu_pool is None:
+            self._cpu_pool = ProcessPoolExecutor(max_workers=2)
+        return self._cpu_pool
+
+    def _get_copy_pool(self) -> ThreadPoolExecutor:
+        """コピー用スレッドプールを遅延生成して返す"""
+
+        if self._copy_pool is None:
+            self._copy_pool = ThreadPoolExecutor(
+                max_workers=min(32, (os.cpu_count() or 1) * 4),
+                thread_name_prefix="backup-copy"
+            )
+        return self._copy_pool
+
+    async def _copy_files_parallel(self, pairs: List[tuple]) -> None:
+        """(コピー元, コピー先) のリストをスレッドプールで並列コピー"""
+
+        if not pairs:
+            return
+
+        loop = asyncio.get_running_loop()
+        pool = self._get_copy_pool()
+        await asyncio.gather(*(
+            loop.run_in_executor(pool, _fastcopy, src, dst)
+            for src, dst in pairs
+        ))
     
     async def initialize(self) -> None:
         """バックアップシステムの初期化"""
         try:
             await self._load_backup_history()
+            await self._load_checksum_cache()
             await self._cleanup_old_backups()
             
             logger.info("BackupManager initialized successfully")
@@ -74,32 +395,30 @@ class BackupManager:
         """フルバックアップの作成"""
         
         backup_id = f"full_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        backup_path = self.backup_dir / f"{backup_id}.tar.gz"
+        backup_path = self.backup_dir / f"{backup_id}{self._archive_extension()}"
         
         try:
-            # 一時ディレクトリでバックアップデータを準備
-            temp_dir = self.backup_dir / f"temp_{backup_id}"
-            temp_dir.mkdir(exist_ok=True)
-            
+            # アーカイブへ直接追加するメンバーを組み立てる (ステージングなし)
+            members: List[tuple] = []
+
             # データベースバックアップ
-            await self._backup_database(database_url, temp_dir / "database.sql")
-            
+            members.extend(self._database_tar_members(database_url))
+
             # 設定ファイルのバックアップ
-            config_backup_dir = temp_dir / "config"
-            config_backup_dir.mkdir(exist_ok=True)
             for config_file in config_files:
                 if os.path.exists(config_file):
-                    shutil.copy2(config_file, config_backup_dir / Path(config_file).name)
-            
+                    members.append(
+                        (Path(config_file), f"config/{Path(config_file).name}")
+                    )
+
             # ユーザーデータのバックアップ
             if user_data_dirs:
-                data_backup_dir = temp_dir / "user_data"
-                data_backup_dir.mkdir(exist_ok=True)
                 for data_dir in user_data_dirs:
                     if os.path.exists(data_dir):
-                        dir_name = Path(data_dir).name
-                        shutil.copytree(data_dir, data_backup_dir / dir_name)
-            
+                        members.append(
+                            (Path(data_dir), f"user_data/{Path(data_dir).name}")
+                        )
+
             # メタデータファイルの作成
             metadata = {
                 "backup_id": backup_id,
@@ -110,19 +429,13 @@ class BackupManager:
                 "user_data_dirs": user_data_dirs or [],
                 "description": description
             }
-            
-            with open(temp_dir / "metadata.json", "w", encoding="utf-8") as f:
-                json.dump(metadata, f, ensure_ascii=False, indent=2)
-            
-            # アーカイブの作成
-            await self._create_archive(temp_dir, backup_path)
-            
-            # 一時ディレクトリの削除
-            shutil.rmtree(temp_dir)
-            
-            # チェックサムの計算
-            checksum = await self._calculate_checksum(backup_path)
-            
+            members.append((_json_dumps_bytes(metadata, indent=True), "metadata.json"))
+
+            # ソースから直接アーカイブ化 (書き込みと同時にチェックサム計算)
+            checksum = await asyncio.to_thread(
+                _sync_tar_from_sources, members, backup_path, self.compress
+            )
+
             # バックアップ情報の作成
             backup_info = BackupInfo(
                 backup_id=backup_id,
@@ -136,37 +449,255 @@ class BackupManager:
             )
             
             # 履歴に追加
-            self.backup_history.append(backup_info)
-            await self._save_backup_history()
+            self._index_backup(backup_info)
+            await self._append_history_ops(self._add_op(backup_info))
             
             logger.info(f"Full backup created: {backup_id}")
             return backup_info
             
         except Exception as e:
             logger.error(f"Failed to create full backup: {e}")
-            # 一時ファイルのクリーンアップ
-            if temp_dir.exists():
-                shutil.rmtree(temp_dir)
             if backup_path.exists():
                 backup_path.unlink()
             raise
     
-    async def create_config_backup(self, 
+    async def create_incremental_backup(self,
+                                        user_data_dirs: List[str],
+                                        description: str = "Incremental backup") -> BackupInfo:
+        """増分バックアップの作成 (内容アドレスの重複排除ストア)
+
+        ファイルを SHA-256 でハッシュし、objects/<hash先頭2桁>/<hash> に
+        未格納の内容だけをコピーする。マニフェストがファイルと内容の
+        対応を記録するので、変更のない内容は何世代でも 1 コピーで済む
+        """
+
+        # 増分は 1 秒間に複数回走り得るのでマイクロ秒まで ID に含める
+        backup_id = f"incremental_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+        manifest_path = self.backup_dir / f"{backup_id}.manifest.json"
+        objects_dir = self.backup_dir / "objects"
+
+        try:
+            objects_dir.mkdir(exist_ok=True)
+
+            files = []
+            new_objects = 0
+            total_bytes = 0
+
+            for data_dir in user_data_dirs:
+                if not os.path.exists(data_dir):
+                    continue
+                dir_name = Path(data_dir).name
+
+                for root, _dirs, names in os.walk(data_dir):
+                    for name in names:
+                        file_path = Path(root) / name
+                        file_hash = await self._hash_source_file(file_path)
+                        object_path = objects_dir / file_hash[:2] / file_hash
+
+                        if not object_path.exists():
+                            object_path.parent.mkdir(exist_ok=True)
+                            _fastcopy(file_path, object_path)
+                            new_objects += 1
+
+                        size = file_path.stat().st_size
+                        total_bytes += size
+                        files.append({
+                            "dir": dir_name,
+                            "path": str(file_path.relative_to(data_dir)),
+                            "hash": file_hash,
+                            "size": size
+                        })
+
+            manifest = {
+                "backup_id": backup_id,
+                "backup_type": "incremental",
+                "created_at": datetime.now().isoformat(),
+                "user_data_dirs": user_data_dirs,
+                "files": files,
+                "description": description
+            }
+
+            await asyncio.to_thread(
+                manifest_path.write_bytes,
+                _json_dumps_bytes(manifest, indent=True)
+            )
+
+            checksum = await self._calculate_checksum(manifest_path)
+
+            backup_info = BackupInfo(
+                backup_id=backup_id,
+                created_at=datetime.now(),
+                backup_type="incremental",
+                file_path=str(manifest_path),
+                file_size=manifest_path.stat().st_size,
+                checksum=checksum,
+                description=description,
+                metadata={
+                    "user_data_dirs": user_data_dirs,
+                    "total_files": len(files),
+                    "total_bytes": total_bytes,
+                    "new_objects": new_objects
+                }
+            )
+
+            self._index_backup(backup_info)
+            await self._append_history_ops(self._add_op(backup_info))
+            await self._save_checksum_cache()
+
+            logger.info(
+                f"Incremental backup created: {backup_id} "
+                f"({new_objects}/{len(files)} new objects)"
+            )
+            return backup_info
+
+        except Exception as e:
+            logger.error(f"Failed to create incremental backup: {e}")
+            if manifest_path.exists():
+                manifest_path.unlink()
+            raise
+
+    async def _restore_incremental(self, backup_info: BackupInfo) -> bool:
+        """マニフェストとオブジェクトストアから増分バックアップを復元"""
+
+        try:
+            manifest_path = Path(backup_info.file_path)
+            if not manifest_path.exists():
+                raise FileNotFoundError(f"Manifest not found: {manifest_path}")
+
+            if not await self._verify_checksum(manifest_path, backup_info.checksum):
+                raise ValueError("Manifest checksum verification failed")
+
+            manifest = _json_loads(await asyncio.to_thread(manifest_path.read_bytes))
+
+            objects_dir = self.backup_dir / "objects"
+            dirs_by_name = {
+                Path(original).name: Path(original)
+                for original in manifest.get("user_data_dirs", [])
+            }
+
+            # 既存ディレクトリは退避してから再構築 (_restore_user_data と同じ流儀)
+            for original_dir in dirs_by_name.values():
+                if original_dir.exists():
+                    backup_current = f"{original_dir}.backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                    shutil.move(str(original_dir), backup_current)
+
+            for entry in manifest.get("files", []):
+                original_dir = dirs_by_name.get(entry["dir"])
+                if original_dir is None:
+                    continue
+                target = original_dir / entry["path"]
+                target.parent.mkdir(parents=True, exist_ok=True)
+                object_path = objects_dir / entry["hash"][:2] / entry["hash"]
+                _fastcopy(object_path, target)
+
+            logger.info(f"Incremental backup restored: {backup_info.backup_id}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to restore incremental backup {backup_info.backup_id}: {e}")
+            return False
+
+    def _gc_objects(self) -> int:
+        """どのマニフェストからも参照されないオブジェクトを削除
+
+        マニフェストが 1 つでも読めない場合は参照集合が不完全なため、
+        何も削除せずに中断する (削除すると生きているバックアップを壊す)
+        """
+
+        objects_dir = self.backup_dir / "objects"
+        if not objects_dir.exists():
+            return 0
+
+        referenced = set()
+        for backup in self.backup_history:
+            if backup.backup_type != "incremental":
+                continue
+            try:
+                manifest = _json_loads(Path(backup.file_path).read_bytes())
+                referenced.update(entry["hash"] for entry in manifest.get("files", []))
+            except Exception as e:
+                logger.error(
+                    f"Aborting object GC, unreadable manifest {backup.file_path}: {e}"
+                )
+                return 0
+
+        removed = 0
+        for bucket in objects_dir.iterdir():
+            if not bucket.is_dir():
+                continue
+            for object_path in bucket.iterdir():
+                if object_path.name not in referenced:
+                    object_path.unlink()
+                    removed += 1
+
+        if removed:
+            logger.info(f"Garbage collected {removed} unreferenced backup objects")
+        return removed
+
+    async def _hash_source_file(self, file_path: Path) -> str:
+        """バックアップ元ファイルの SHA-256 を計算 (未変更ならキャッシュ利用)
+
+        (inode, mtime_ns, size) をキーにキャッシュを引き、前回の
+        バックアップから変わっていないファイルは再ハッシュしない
+        """
+
+        st = os.stat(file_path)
+        cache_key = f"{st.st_ino}:{st.st_mtime_ns}:{st.st_size}"
+
+        cached = self._checksum_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        file_hash = await self._calculate_checksum(file_path)
+        self._checksum_cache[cache_key] = file_hash
+        self._checksum_cache_dirty = True
+        return file_hash
+
+    async def _load_checksum_cache(self) -> None:
+        """チェックサムキャッシュの読み込み"""
+
+        if not self._checksum_cache_file.exists():
+            return
+
+        try:
+            raw = await asyncio.to_thread(self._checksum_cache_file.read_bytes)
+            self._checksum_cache = _json_loads(raw)
+            logger.info(f"Loaded {len(self._checksum_cache)} cached checksums")
+        except Exception as e:
+            logger.error(f"Failed to load checksum cache: {e}")
+            self._checksum_cache = {}
+
+    async def _save_checksum_cache(self) -> None:
+        """チェックサムキャッシュの保存 (変更があった場合のみ)"""
+
+        if not self._checksum_cache_dirty:
+            return
+
+        try:
+            payload = _json_dumps_bytes(self._checksum_cache, indent=False)
+            await asyncio.to_thread(self._checksum_cache_file.write_bytes, payload)
+            self._checksum_cache_dirty = False
+        except Exception as e:
+            logger.error(f"Failed to save checksum cache: {e}")
+
+    async def create_config_backup(self,
                                  config_files: List[str],
                                  description: str = "Configuration backup") -> BackupInfo:
         """設定ファイルのみのバックアップ"""
         
         backup_id = f"config_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        backup_path = self.backup_dir / f"{backup_id}.tar.gz"
+        backup_path = self.backup_dir / f"{backup_id}{self._archive_extension()}"
         
         try:
             temp_dir = self.backup_dir / f"temp_{backup_id}"
             temp_dir.mkdir(exist_ok=True)
             
-            # 設定ファイルのコピー
-            for config_file in config_files:
-                if os.path.exists(config_file):
-                    shutil.copy2(config_file, temp_dir / Path(config_file).name)
+            # 設定ファイルのコピー (並列)
+            await self._copy_files_parallel([
+                (config_file, temp_dir / Path(config_file).name)
+                for config_file in config_files
+                if os.path.exists(config_file)
+            ])
             
             # メタデータ
             metadata = {
@@ -177,14 +708,17 @@ class BackupManager:
                 "description": description
             }
             
-            with open(temp_dir / "metadata.json", "w", encoding="utf-8") as f:
-                json.dump(metadata, f, ensure_ascii=False, indent=2)
-            
-            # アーカイブ作成
-            await self._create_archive(temp_dir, backup_path)
+            await asyncio.to_thread(
+                (temp_dir / "metadata.json").write_bytes,
+                _json_dumps_bytes(metadata, indent=True)
+            )
+
+            # アーカイブ作成 (書き込みと同時にチェックサム計算)
+            checksum = await self._create_archive(temp_dir, backup_path)
             shutil.rmtree(temp_dir)
-            
-            checksum = await self._calculate_checksum(backup_path)
+
+            if checksum is None:
+                checksum = await self._calculate_checksum(backup_path)
             
             backup_info = BackupInfo(
                 backup_id=backup_id,
@@ -196,9 +730,9 @@ class BackupManager:
                 description=description,
                 metadata=metadata
             )
-            
-            self.backup_history.append(backup_info)
-            await self._save_backup_history()
+
+            self._index_backup(backup_info)
+            await self._append_history_ops(self._add_op(backup_info))
             
             logger.info(f"Config backup created: {backup_id}")
             return backup_info
@@ -223,27 +757,26 @@ class BackupManager:
             backup_info = await self.get_backup_info(backup_id)
             if not backup_info:
                 raise ValueError(f"Backup not found: {backup_id}")
-            
+
+            # 増分バックアップはオブジェクトストアから復元
+            if backup_info.backup_type == "incremental":
+                return await self._restore_incremental(backup_info)
+
             backup_path = Path(backup_info.file_path)
             if not backup_path.exists():
                 raise FileNotFoundError(f"Backup file not found: {backup_path}")
-            
-            # チェックサムの検証
-            if not await self._verify_checksum(backup_path, backup_info.checksum):
-                raise ValueError("Backup file checksum verification failed")
-            
+
             # 復元用一時ディレクトリ
             restore_dir = self.backup_dir / f"restore_{backup_id}"
             restore_dir.mkdir(exist_ok=True)
-            
-            # アーカイブの展開
-            await self._extract_archive(backup_path, restore_dir)
+
+            # アーカイブの展開 (読み取りと同時にチェックサム検証)
+            await self._extract_archive(backup_path, restore_dir, backup_info.checksum)
             
             # メタデータの読み込み
             metadata_file = restore_dir / "metadata.json"
             if metadata_file.exists():
-                with open(metadata_file, "r", encoding="utf-8") as f:
-                    metadata = json.load(f)
+                metadata = _json_loads(await asyncio.to_thread(metadata_file.read_bytes))
             else:
                 metadata = backup_info.metadata
             
@@ -286,66 +819,78 @@ class BackupManager:
     
     async def list_backups(self, backup_type: Optional[str] = None) -> List[BackupInfo]:
         """バックアップ一覧を取得"""
-        
+
         if backup_type:
-            return [b for b in self.backup_history if b.backup_type == backup_type]
+            return list(self._by_type.get(backup_type, ()))
         else:
             return self.backup_history.copy()
-    
+
     async def get_backup_info(self, backup_id: str) -> Optional[BackupInfo]:
         """特定のバックアップ情報を取得"""
-        
-        for backup in self.backup_history:
-            if backup.backup_id == backup_id:
-                return backup
-        return None
-    
+
+        return self._by_id.get(backup_id)
+
+    def _index_backup(self, backup_info: BackupInfo) -> None:
+        """バックアップを履歴とインデックスに登録"""
+
+        self.backup_history.append(backup_info)
+        self._by_id[backup_info.backup_id] = backup_info
+        self._by_type[backup_info.backup_type].append(backup_info)
+
+    def _delete_backup_entry(self, backup_info: BackupInfo) -> None:
+        """ファイルを消し、履歴とインデックスから除外 (保存は呼び出し側)"""
+
+        backup_path = Path(backup_info.file_path)
+        if backup_path.exists():
+            backup_path.unlink()
+
+        self.backup_history.remove(backup_info)
+        self._by_id.pop(backup_info.backup_id, None)
+        type_bucket = self._by_type.get(backup_info.backup_type)
+        if type_bucket and backup_info in type_bucket:
+            type_bucket.remove(backup_info)
+
     async def delete_backup(self, backup_id: str) -> bool:
         """バックアップを削除"""
-        
+
         try:
-            backup_info = await self.get_backup_info(backup_id)
+            backup_info = self._by_id.get(backup_id)
             if not backup_info:
                 return False
-            
-            # ファイル削除
-            backup_path = Path(backup_info.file_path)
-            if backup_path.exists():
-                backup_path.unlink()
-            
-            # 履歴から削除
-            self.backup_history = [b for b in self.backup_history if b.backup_id != backup_id]
-            await self._save_backup_history()
-            
+
+            self._delete_backup_entry(backup_info)
+            await self._append_history_ops({"op": "del", "id": backup_id})
+
+            # 増分バックアップなら参照されなくなったオブジェクトを回収
+            if backup_info.backup_type == "incremental":
+                self._gc_objects()
+
             logger.info(f"Backup deleted: {backup_id}")
             return True
-            
+
         except Exception as e:
             logger.error(f"Failed to delete backup {backup_id}: {e}")
             return False
     
-    async def _backup_database(self, database_url: str, output_file: Path) -> None:
-        """データベースのバックアップ"""
-        
-        try:
-            if database_url.startswith("sqlite"):
-                # SQLite の場合はファイルコピー
-                db_file = database_url.replace("sqlite:///", "")
-                if os.path.exists(db_file):
-                    shutil.copy2(db_file, output_file.with_suffix(".db"))
-            
-            elif database_url.startswith("postgresql"):
-                # PostgreSQL の場合は pg_dump を使用
-                # 実際の実装では pg_dump コマンドを実行
-                # subprocess.run(["pg_dump", database_url, "-f", str(output_file)])
-                pass
-            
-            else:
-                logger.warning(f"Unsupported database type for backup: {database_url}")
-                
-        except Exception as e:
-            logger.error(f"Database backup failed: {e}")
-            raise
+    def _database_tar_members(self, database_url: str) -> List[tuple]:
+        """データベースをアーカイブへ直接追加するためのメンバー一覧"""
+
+        if database_url.startswith("sqlite"):
+            # SQLite の場合は DB ファイルをそのまま追加
+            db_file = database_url.replace("sqlite:///", "")
+            if os.path.exists(db_file):
+                return [(Path(db_file), "database.db")]
+
+        elif database_url.startswith("postgresql"):
+            # PostgreSQL の場合は pg_dump を使用
+            # 実際の実装では pg_dump 出力の一時ファイルを追加
+            # subprocess.run(["pg_dump", database_url, "-f", str(output_file)])
+            pass
+
+        else:
+            logger.warning(f"Unsupported database type for backup: {database_url}")
+
+        return []
     
     async def _restore_database(self, database_url: str, backup_file: Path) -> None:
         """データベースの復元"""
@@ -355,7 +900,7 @@ class BackupManager:
                 # SQLite の場合はファイル復元
                 db_file = database_url.replace("sqlite:///", "")
                 if backup_file.with_suffix(".db").exists():
-                    shutil.copy2(backup_file.with_suffix(".db"), db_file)
+                    _fastcopy(backup_file.with_suffix(".db"), db_file)
             
             elif database_url.startswith("postgresql"):
                 # PostgreSQL の場合は psql を使用
@@ -377,11 +922,11 @@ class BackupManager:
                 # バックアップを作成してから復元
                 if os.path.exists(original_path):
                     backup_current = f"{original_path}.backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                    shutil.copy2(original_path, backup_current)
-                
+                    _fastcopy(original_path, backup_current)
+
                 # 復元
                 os.makedirs(Path(original_path).parent, exist_ok=True)
-                shutil.copy2(backup_config, original_path)
+                _fastcopy(backup_config, original_path)
                 logger.info(f"Restored config file: {original_path}")
     
     async def _restore_user_data(self, data_dir: Path, original_dirs: List[str]) -> None:
@@ -398,99 +943,265 @@ class BackupManager:
                     shutil.move(original_dir, backup_current)
                 
                 # 復元
-                shutil.copytree(backup_data_dir, original_dir)
+                await asyncio.to_thread(_fast_copytree, backup_data_dir, original_dir)
                 logger.info(f"Restored user data: {original_dir}")
     
-    async def _create_archive(self, source_dir: Path, output_path: Path) -> None:
-        """アーカイブの作成"""
-        
+    async def _create_archive(self, source_dir: Path, output_path: Path) -> Optional[str]:
+        """アーカイブの作成
+
+        書き込みと同時にチェックサムを計算できた場合はそれを返す。
+        None を返した場合は呼び出し側が別途計算する
+        """
+
         if self.compress:
-            # gzip 圧縮 tar アーカイブ
-            shutil.make_archive(
-                str(output_path.with_suffix("")),
+            # pigz があれば全コアで gzip 圧縮 (出力形式は同じ .tar.gz)。
+            # 圧縮出力を書きながらハッシュも更新するので再読込が不要
+            checksum = await self._create_archive_pigz(source_dir, output_path)
+            if checksum is not None:
+                return checksum
+
+            # gzip 圧縮 tar アーカイブ (圧縮はプロセスプールへ逃す)
+            await asyncio.get_running_loop().run_in_executor(
+                self._get_cpu_pool(),
+                shutil.make_archive,
+                self._archive_base_name(output_path),
                 "gztar",
                 str(source_dir)
             )
         else:
-            # 無圧縮 tar アーカイブ
-            shutil.make_archive(
-                str(output_path.with_suffix("")),
+            # 無圧縮 tar アーカイブ (I/O 主体なのでスレッドで十分)
+            await asyncio.to_thread(
+                shutil.make_archive,
+                self._archive_base_name(output_path),
                 "tar",
                 str(source_dir)
             )
+
+        return None
+
+    def _archive_extension(self) -> str:
+        """圧縮設定に応じたアーカイブ拡張子"""
+
+        return ".tar.gz" if self.compress else ".tar"
+
+    @staticmethod
+    def _archive_base_name(output_path: Path) -> str:
+        """make_archive 用のベース名 (.tar.gz / .tar を除いたパス)"""
+
+        name = str(output_path)
+        for suffix in (".tar.gz", ".tar"):
+            if name.endswith(suffix):
+                return name[:-len(suffix)]
+        return name
+
+    async def _create_archive_pigz(self, source_dir: Path, output_path: Path) -> Optional[str]:
+        """tar | pigz パイプラインでマルチコア圧縮
+
+        圧縮ストリームをファイルへ書き出しながら SHA-256 を計算し、
+        成功時はそのチェックサムを返す (使えなければ None)
+        """
+
+        if shutil.which("pigz") is None or shutil.which("tar") is None:
+            return None
+
+        try:
+            read_fd, write_fd = os.pipe()
+            try:
+                tar_proc = await asyncio.create_subprocess_exec(
+                    "tar", "-C", str(source_dir), "-cf", "-", ".",
+                    stdout=write_fd
+                )
+            finally:
+                os.close(write_fd)
+
+            try:
+                pigz_proc = await asyncio.create_subprocess_exec(
+                    "pigz", "-c",
+                    stdin=read_fd,
+                    stdout=asyncio.subprocess.PIPE
+                )
+            finally:
+                os.close(read_fd)
+
+            digest = hashlib.sha256()
+            with open(output_path, "wb") as out:
+                while True:
+                    chunk = await pigz_proc.stdout.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    out.write(chunk)
+
+            tar_rc = await tar_proc.wait()
+            pigz_rc = await pigz_proc.wait()
+
+            if tar_rc == 0 and pigz_rc == 0:
+                return digest.hexdigest()
+
+            logger.warning(
+                f"pigz pipeline failed (tar={tar_rc}, pigz={pigz_rc}), "
+                "falling back to shutil.make_archive"
+            )
+
+        except Exception as e:
+            logger.warning(f"pigz pipeline unavailable: {e}")
+
+        if output_path.exists():
+            output_path.unlink()
+        return None
     
-    async def _extract_archive(self, archive_path: Path, extract_dir: Path) -> None:
-        """アーカイブの展開"""
-        
-        shutil.unpack_archive(str(archive_path), str(extract_dir))
-    
-    async def _calculate_checksum(self, file_path: Path) -> str:
-        """ファイルのチェックサムを計算"""
-        
-        import hashlib
-        
-        hash_md5 = hashlib.md5()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_md5.update(chunk)
-        
-        return hash_md5.hexdigest()
+    async def _extract_archive(self, archive_path: Path, extract_dir: Path,
+                               expected_checksum: str) -> None:
+        """アーカイブの展開 (読み取りながらチェックサムを検証)
+
+        検証のための事前読みと展開の 2 パスを 1 パスに融合し、
+        復元時の読み取り帯域を半分にする。不一致の場合は展開済みの
+        ファイルを削除して例外を送出する
+        """
+
+        verified = await asyncio.to_thread(
+            _sync_extract_verified, str(archive_path), str(extract_dir),
+            expected_checksum
+        )
+        if not verified:
+            shutil.rmtree(extract_dir, ignore_errors=True)
+            raise ValueError("Backup file checksum verification failed")
     
+    async def _calculate_checksum(self, file_path: Path, algorithm: str = "sha256") -> str:
+        """ファイルのチェックサムを計算
+
+        SHA-256 は OpenSSL 経由でハードウェア命令 (SHA-NI) を使うため
+        大きなアーカイブでも MD5 より高速。実際のハッシュ計算は
+        プロセスプールで行い、イベントループを塞がない
+        """
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_cpu_pool(), _sync_calculate_checksum, str(file_path), algorithm
+        )
+
     async def _verify_checksum(self, file_path: Path, expected_checksum: str) -> bool:
         """チェックサムの検証"""
-        
-        actual_checksum = await self._calculate_checksum(file_path)
+
+        # 旧バックアップの MD5 チェックサム (32桁hex) も検証できるようにする
+        algorithm = "md5" if len(expected_checksum) == 32 else "sha256"
+        actual_checksum = await self._calculate_checksum(file_path, algorithm)
         return actual_checksum == expected_checksum
     
+    @staticmethod
+    def _backup_from_dict(item: Dict[str, Any]) -> BackupInfo:
+        """履歴エントリの辞書から BackupInfo を復元"""
+
+        return BackupInfo(
+            backup_id=item["backup_id"],
+            created_at=datetime.fromisoformat(item["created_at"]),
+            backup_type=item["backup_type"],
+            file_path=item["file_path"],
+            file_size=item["file_size"],
+            checksum=item["checksum"],
+            description=item["description"],
+            metadata=item["metadata"]
+        )
+
+    @staticmethod
+    def _add_op(backup: BackupInfo) -> Dict[str, Any]:
+        """履歴ログの追加オペレーション行を生成"""
+
+        return {
+            "op": "add",
+            "backup_id": backup.backup_id,
+            "created_at": backup.created_at.isoformat(),
+            "backup_type": backup.backup_type,
+            "file_path": backup.file_path,
+            "file_size": backup.file_size,
+            "checksum": backup.checksum,
+            "description": backup.description,
+            "metadata": backup.metadata
+        }
+
     async def _load_backup_history(self) -> None:
-        """バックアップ履歴の読み込み"""
-        
-        if self.history_file.exists():
-            try:
-                with open(self.history_file, "r", encoding="utf-8") as f:
-                    history_data = json.load(f)
-                
+        """バックアップ履歴の読み込み (JSONL ログをリプレイ)"""
+
+        try:
+            if self.history_file.exists():
+                raw = await asyncio.to_thread(self.history_file.read_bytes)
+
+                live: Dict[str, BackupInfo] = {}
+                entries = 0
+                for line in raw.splitlines():
+                    if not line.strip():
+                        continue
+                    entries += 1
+                    op = _json_loads(line)
+                    if op.get("op") == "del":
+                        live.pop(op["id"], None)
+                    else:
+                        live[op["backup_id"]] = self._backup_from_dict(op)
+
+                self.backup_history = list(live.values())
+                self._history_log_entries = entries
+
+            elif self.legacy_history_file.exists():
+                # 旧形式 (全件 JSON 配列) からの移行
+                raw = await asyncio.to_thread(self.legacy_history_file.read_bytes)
                 self.backup_history = [
-                    BackupInfo(
-                        backup_id=item["backup_id"],
-                        created_at=datetime.fromisoformat(item["created_at"]),
-                        backup_type=item["backup_type"],
-                        file_path=item["file_path"],
-                        file_size=item["file_size"],
-                        checksum=item["checksum"],
-                        description=item["description"],
-                        metadata=item["metadata"]
-                    )
-                    for item in history_data
+                    self._backup_from_dict(item) for item in _json_loads(raw)
                 ]
-                
-                logger.info(f"Loaded {len(self.backup_history)} backup records")
-                
-            except Exception as e:
-                logger.error(f"Failed to load backup history: {e}")
-                self.backup_history = []
-    
+                await self._save_backup_history()
+                self.legacy_history_file.unlink()
+                logger.info("Migrated backup history to JSONL log")
+
+            logger.info(f"Loaded {len(self.backup_history)} backup records")
+
+        except Exception as e:
+            logger.error(f"Failed to load backup history: {e}")
+            self.backup_history = []
+            self._history_log_entries = 0
+
+        # インデックスを再構築
+        self._by_id = {b.backup_id: b for b in self.backup_history}
+        self._by_type = defaultdict(list)
+        for backup in self.backup_history:
+            self._by_type[backup.backup_type].append(backup)
+
+    async def _append_history_ops(self, *ops: Dict[str, Any]) -> None:
+        """履歴ログへオペレーション行を追記し、肥大化したら圧縮"""
+
+        if not ops:
+            return
+
+        try:
+            payload = b"".join(
+                _json_dumps_bytes(op, indent=False) + b"\n" for op in ops
+            )
+            await asyncio.to_thread(self._append_history_bytes, payload)
+            self._history_log_entries += len(ops)
+
+            # 生存レコード数の 2 倍を超えたら生存分のみで書き直す
+            if self._history_log_entries > 2 * max(1, len(self.backup_history)):
+                await self._save_backup_history()
+
+        except Exception as e:
+            logger.error(f"Failed to append backup history: {e}")
+            raise
+
+    def _append_history_bytes(self, payload: bytes) -> None:
+        """履歴ログファイルへの追記 (同期)"""
+
+        with open(self.history_file, "ab") as f:
+            f.write(payload)
+
     async def _save_backup_history(self) -> None:
-        """バックアップ履歴の保存"""
-        
+        """バックアップ履歴の保存 (生存レコードのみでログを書き直す)"""
+
         try:
-            history_data = [
-                {
-                    "backup_id": backup.backup_id,
-                    "created_at": backup.created_at.isoformat(),
-                    "backup_type": backup.backup_type,
-                    "file_path": backup.file_path,
-                    "file_size": backup.file_size,
-                    "checksum": backup.checksum,
-                    "description": backup.description,
-                    "metadata": backup.metadata
-                }
+            payload = b"".join(
+                _json_dumps_bytes(self._add_op(backup), indent=False) + b"\n"
                 for backup in self.backup_history
-            ]
-            
-            with open(self.history_file, "w", encoding="utf-8") as f:
-                json.dump(history_data, f, ensure_ascii=False, indent=2)
-                
+            )
+            await asyncio.to_thread(self.history_file.write_bytes, payload)
+            self._history_log_entries = len(self.backup_history)
+
         except Exception as e:
             logger.error(f"Failed to save backup history: {e}")
             raise
@@ -505,9 +1216,23 @@ class BackupManager:
         sorted_backups = sorted(self.backup_history, key=lambda x: x.created_at)
         backups_to_delete = sorted_backups[:-self.max_backups]
         
+        # まとめて削除し、ログへの追記は最後に 1 回だけ行う
+        deleted_incremental = False
+        del_ops = []
         for backup in backups_to_delete:
-            await self.delete_backup(backup.backup_id)
-        
+            try:
+                self._delete_backup_entry(backup)
+                del_ops.append({"op": "del", "id": backup.backup_id})
+                if backup.backup_type == "incremental":
+                    deleted_incremental = True
+            except Exception as e:
+                logger.error(f"Failed to delete backup {backup.backup_id}: {e}")
+
+        await self._append_history_ops(*del_ops)
+
+        if deleted_incremental:
+            self._gc_objects()
+
         logger.info(f"Cleaned up {len(backups_to_delete)} old backups")
     
     async def get_stats(self) -> Dict[str, Any]: